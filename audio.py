@@ -0,0 +1,373 @@
+"""
+Microphone Capture
+
+Streams microphone audio to a WAV file next to a video recording. PyAudio
+delivers chunks to a callback on its own thread; the callback only copies
+them into a preallocated ring buffer, and a writer thread drains the ring
+into the WAV file. Memory use is fixed by the ring size no matter how long
+the recording runs.
+
+The writer thread also computes peak and RMS levels of every chunk for a
+level meter and can pause writing while the input stays silent.
+"""
+
+import threading
+import time
+import wave
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import pyaudio
+except ImportError:  # Audio is optional; video works without it
+    pyaudio = None
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size single-producer, single-consumer ring of audio chunks.
+
+    The producer (PortAudio callback) only advances the write index and the
+    consumer (writer thread) only advances the read index, so neither side
+    takes a lock. When the ring is full the newest chunk is dropped and
+    counted as an overrun rather than blocking the callback.
+    """
+
+    def __init__(self, chunk_bytes: int, slots: int = 256):
+        """
+        Initialize the ring.
+
+        Args:
+            chunk_bytes: Size of one audio chunk in bytes
+            slots: Number of chunks the ring can hold
+        """
+        self.chunk_bytes = chunk_bytes
+        self.slots = slots
+        self.overruns = 0
+
+        self._data = np.zeros((slots, chunk_bytes), dtype=np.uint8)
+        self._lengths = np.zeros(slots, dtype=np.int64)
+        self._write = 0
+        self._read = 0
+        self._ready = threading.Event()
+
+    def __len__(self) -> int:
+        """Number of chunks waiting to be read."""
+        return self._write - self._read
+
+    def put(self, data: bytes) -> bool:
+        """
+        Copy a chunk into the ring (producer side).
+
+        Returns:
+            True if stored, False if the ring was full and it was dropped
+        """
+        if self._write - self._read >= self.slots:
+            self.overruns += 1
+            return False
+        slot = self._write % self.slots
+        size = min(len(data), self.chunk_bytes)
+        self._data[slot, :size] = np.frombuffer(data, dtype=np.uint8, count=size)
+        self._lengths[slot] = size
+        # Publish the chunk only after it is fully copied
+        self._write += 1
+        self._ready.set()
+        return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Take the oldest chunk (consumer side).
+
+        Args:
+            timeout: Maximum time to wait for a chunk (None waits forever)
+
+        Returns:
+            The chunk, or None on timeout
+        """
+        if self._write == self._read:
+            self._ready.clear()
+            # Re-check after clearing so a put() in between is not missed
+            if self._write == self._read and not self._ready.wait(timeout):
+                return None
+            if self._write == self._read:
+                return None
+        slot = self._read % self.slots
+        chunk = self._data[slot, :self._lengths[slot]].tobytes()
+        # Free the slot only once it has been copied out
+        self._read += 1
+        return chunk
+
+
+# Seconds between sample clock / monotonic clock sync points
+SYNC_INTERVAL = 0.5
+
+# Level reported for digital silence, in dBFS
+MIN_LEVEL_DB = -100.0
+
+
+def _to_db(level: float) -> float:
+    """Convert a 0..1 amplitude to dBFS."""
+    return float(20 * np.log10(level)) if level > 0 else MIN_LEVEL_DB
+
+
+class AudioRecorder:
+    """
+    Callback-mode microphone capture streamed to a WAV file.
+
+    Every SYNC_INTERVAL the callback notes how many samples have been stored
+    and the monotonic time they arrived, which lets recordings map video
+    frame timestamps to WAV sample offsets and measure clock drift.
+    """
+
+    def __init__(self, device_index: Optional[int] = None, rate: int = 44100,
+                 channels: int = 1, chunk: int = 1024, buffer_seconds: float = 5.0,
+                 silence_db: Optional[float] = None, silence_seconds: float = 2.0):
+        """
+        Initialize the recorder.
+
+        Args:
+            device_index: PyAudio input device index (None for the default)
+            rate: Sample rate in Hz
+            channels: Number of channels
+            chunk: Frames per PyAudio buffer
+            buffer_seconds: Audio the ring can hold while the disk stalls
+            silence_db: RMS level (dBFS) below which input counts as silence;
+                        None never pauses writing
+            silence_seconds: How long silence lasts before writing pauses
+        """
+        self.device_index = device_index
+        self.rate = rate
+        self.channels = channels
+        self.chunk = chunk
+        self.sample_width = 2  # paInt16
+        self.path: Optional[Path] = None
+        self.frames_written = 0
+        self.frames_stored = 0
+        self.input_overflows = 0
+        self.start_time: Optional[float] = None
+        self._sync_times = array('d')
+        self._sync_samples = array('q')
+        self._next_sync = 0.0
+
+        # Level meter and silence detection, updated by the writer thread
+        self.peak_db = MIN_LEVEL_DB
+        self.rms_db = MIN_LEVEL_DB
+        self.silence_db = silence_db
+        self.silence_seconds = silence_seconds
+        self.paused = False
+        self.frames_skipped = 0
+        # (stored sample offset, length) of every stretch left out of the WAV
+        self.gaps: List[List[int]] = []
+
+        chunk_bytes = chunk * channels * self.sample_width
+        slots = max(8, int(buffer_seconds * rate / chunk))
+        self.ring = AudioRingBuffer(chunk_bytes, slots)
+
+        self._pa = None
+        self._stream = None
+        self._wav: Optional[wave.Wave_write] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def is_recording(self) -> bool:
+        """Whether audio is being captured."""
+        return self._stream is not None
+
+    def start(self, path: Path) -> bool:
+        """
+        Open the microphone and start writing to a WAV file.
+
+        Args:
+            path: Output WAV file
+
+        Returns:
+            True if capture started, False otherwise
+        """
+        if pyaudio is None:
+            print("Error: PyAudio is not installed, recording without audio")
+            return False
+
+        self.path = Path(path)
+        self._wav = wave.open(str(self.path), 'wb')
+        self._wav.setnchannels(self.channels)
+        self._wav.setsampwidth(self.sample_width)
+        self._wav.setframerate(self.rate)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="AudioWriter", daemon=True)
+        self._thread.start()
+
+        try:
+            self._pa = pyaudio.PyAudio()
+            self._stream = self._pa.open(
+                format=pyaudio.paInt16, channels=self.channels, rate=self.rate,
+                input=True, input_device_index=self.device_index,
+                frames_per_buffer=self.chunk, stream_callback=self._callback
+            )
+        except (OSError, ValueError) as e:
+            print(f"Error: Could not open microphone: {e}")
+            self._stream = None
+            self.stop()
+            self.path.unlink(missing_ok=True)
+            return False
+
+        self.start_time = time.monotonic()
+        return True
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """PortAudio callback: copy the chunk and return immediately."""
+        if status & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+        if self.ring.put(in_data):
+            # Offsets count stored samples so they index into the WAV file
+            self.frames_stored += frame_count
+            now = time.monotonic()
+            if now >= self._next_sync:
+                self._next_sync = now + SYNC_INTERVAL
+                self._sync_times.append(now)
+                self._sync_samples.append(self.frames_stored)
+        return (None, pyaudio.paContinue)
+
+    def clock_fit(self) -> Optional[Tuple[float, float]]:
+        """
+        Fit the WAV sample clock against the monotonic clock.
+
+        Returns:
+            (samples per second, monotonic time of sample 0) from a least
+            squares fit over the sync points, or None with fewer than two
+        """
+        if len(self._sync_times) < 2:
+            return None
+        times = np.array(self._sync_times, dtype=np.float64)
+        samples = np.array(self._sync_samples, dtype=np.float64)
+        # Fit around the first point to keep the numbers well conditioned
+        rate, offset = np.polyfit(times - times[0], samples, 1)
+        return float(rate), float(times[0] - offset / rate)
+
+    def wav_offsets(self, stored: np.ndarray) -> np.ndarray:
+        """
+        Convert stored-sample offsets into offsets in the WAV file.
+
+        Args:
+            stored: Sample offsets on the capture clock (see clock_fit())
+
+        Returns:
+            Offsets with silence gaps removed; -1 where the audio was left
+            out of the file or lies outside it
+        """
+        stored = np.asarray(stored, dtype=np.int64)
+        offsets = stored.copy()
+        if self.gaps:
+            starts = np.array([gap[0] for gap in self.gaps], dtype=np.int64)
+            lengths = np.array([gap[1] for gap in self.gaps], dtype=np.int64)
+            skipped = np.concatenate(([0], np.cumsum(lengths)))
+            # Last gap starting at or before each offset
+            i = np.searchsorted(starts, stored, side="right") - 1
+            inside = (i >= 0) & (stored < starts[i] + lengths[i])
+            offsets = stored - skipped[i + 1]
+            offsets[inside] = -1
+        offsets[(stored < 0) | (offsets >= self.frames_written)] = -1
+        return offsets
+
+    def _measure(self, chunk: bytes) -> float:
+        """Update the peak/RMS meter from one chunk; returns the RMS in dBFS."""
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        if samples.size == 0:
+            return self.rms_db
+        peak = max(int(samples.max()), -int(samples.min())) / 32768
+        values = samples.astype(np.float32)
+        rms = float(np.sqrt(np.dot(values, values) / samples.size)) / 32768
+        self.peak_db = _to_db(peak)
+        self.rms_db = _to_db(rms)
+        return self.rms_db
+
+    def _run(self):
+        """Drain the ring into the WAV file until stopped."""
+        frame_bytes = self.channels * self.sample_width
+        consumed = 0
+        quiet = 0
+        while True:
+            chunk = self.ring.get(timeout=0.2)
+            if chunk is None:
+                if self._stop.is_set():
+                    break
+                continue
+            frames = len(chunk) // frame_bytes
+
+            # Metering runs here rather than in the PortAudio callback
+            rms_db = self._measure(chunk)
+            if self.silence_db is not None:
+                quiet = quiet + frames if rms_db < self.silence_db else 0
+                self.paused = quiet > self.silence_seconds * self.rate
+
+            if self.paused:
+                if self.gaps and self.gaps[-1][0] + self.gaps[-1][1] == consumed:
+                    self.gaps[-1][1] += frames
+                else:
+                    self.gaps.append([consumed, frames])
+                self.frames_skipped += frames
+            else:
+                # The header is patched once on close, not per chunk
+                self._wav.writeframesraw(chunk)
+                self.frames_written += frames
+            consumed += frames
+
+    def levels(self) -> Dict[str, Any]:
+        """
+        Get the latest input levels.
+
+        Returns:
+            Dictionary with peak_db and rms_db (dBFS of the last chunk) and
+            whether writing is paused for silence
+        """
+        return {"peak_db": self.peak_db, "rms_db": self.rms_db, "paused": self.paused}
+
+    def stop(self) -> Dict[str, Any]:
+        """
+        Stop capturing, write what is left in the ring and close the file.
+
+        Returns:
+            Recording statistics (see stats())
+        """
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._wav:
+            self._wav.close()
+            self._wav = None
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get audio statistics.
+
+        Returns:
+            Dictionary with the WAV path, sample rate, frames written,
+            seconds of audio, chunks dropped because the ring was full and
+            PortAudio input overflows
+        """
+        return {
+            "file": str(self.path) if self.path else None,
+            "rate": self.rate,
+            "channels": self.channels,
+            "frames": self.frames_written,
+            "seconds": self.frames_written / self.rate,
+            "buffered": len(self.ring),
+            "overruns": self.ring.overruns,
+            "input_overflows": self.input_overflows,
+            "silence_skipped_seconds": self.frames_skipped / self.rate,
+            "silence_pauses": len(self.gaps),
+        }
@@ -0,0 +1,232 @@
+"""
+Simple Camera Benchmarks
+
+End-to-end measurements of what the capture, photo encoding and video
+writing paths can sustain on this machine, over a matrix of sources,
+resolutions, photo formats and video codecs.
+"""
+
+import cv2
+import json
+import platform
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple, Union
+
+import numpy as np
+
+from camera import Camera, CODEC_CANDIDATES
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+PHOTO_FORMATS = ["png", "jpg", "bmp"]
+VIDEO_CODECS = [fourcc for fourcc, _ in CODEC_CANDIDATES]
+
+
+def _latency_stats(samples: List[float]) -> Dict[str, float]:
+    """Summarize per-item latencies (seconds) as milliseconds."""
+    if not samples:
+        return {"p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ms = np.asarray(samples) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+    }
+
+
+def _row(source, resolution, stage: str, variant: str, count: int, wall: float,
+         cpu: float, samples: Optional[List[float]] = None, **extra) -> Dict[str, Any]:
+    """Build one result row."""
+    row = {
+        "source": str(source),
+        "resolution": f"{resolution[0]}x{resolution[1]}",
+        "stage": stage,
+        "variant": variant,
+        "count": count,
+        "fps": count / wall if wall > 0 else 0.0,
+        "cpu_s": cpu,
+        "cpu_percent": cpu / wall * 100 if wall > 0 else 0.0,
+    }
+    row.update(_latency_stats(samples or []))
+    row.update(extra)
+    return row
+
+
+def bench_capture(cam: Camera, frames: int) -> Tuple[Dict[str, Any], List[np.ndarray]]:
+    """
+    Measure read throughput and per-frame read latency.
+
+    Returns:
+        The result row and a few captured frames to feed the encoders
+    """
+    latencies = []
+    samples = []
+    failures = 0
+    sample_every = max(1, frames // 10)
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    for i in range(frames):
+        t0 = time.perf_counter()
+        frame = cam.read_frame()
+        latencies.append(time.perf_counter() - t0)
+        if frame is None:
+            failures += 1
+            continue
+        if i % sample_every == 0:
+            samples.append(frame.image.copy())
+        frame.release()
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    height, width = samples[0].shape[:2] if samples else (0, 0)
+    row = _row(cam.camera_id, (width, height), "capture", "read",
+               frames - failures, wall, cpu, latencies, failures=failures,
+               backend=cam.cap.getBackendName())
+    return row, samples
+
+
+def bench_photos(cam: Camera, samples: List[np.ndarray], formats: List[str],
+                 count: int, output_dir: Path) -> List[Dict[str, Any]]:
+    """Measure in-memory imencode and on-disk imwrite latency per format."""
+    rows = []
+    height, width = samples[0].shape[:2]
+    for fmt in formats:
+        for stage in ("imencode", "imwrite"):
+            latencies = []
+            size = 0
+            cpu_start = time.process_time()
+            start = time.perf_counter()
+            for i in range(count):
+                image = samples[i % len(samples)]
+                t0 = time.perf_counter()
+                if stage == "imencode":
+                    ok, data = cv2.imencode(f".{fmt}", image)
+                    size += len(data) if ok else 0
+                else:
+                    path = output_dir / f"bench_{i}.{fmt}"
+                    cv2.imwrite(str(path), image)
+                    size += path.stat().st_size
+                latencies.append(time.perf_counter() - t0)
+            wall = time.perf_counter() - start
+            cpu = time.process_time() - cpu_start
+            rows.append(_row(cam.camera_id, (width, height), stage, fmt, count, wall,
+                             cpu, latencies, avg_bytes=size // max(1, count)))
+    return rows
+
+
+def bench_video(cam: Camera, samples: List[np.ndarray], codecs: List[str],
+                frames: int, output_dir: Path) -> List[Dict[str, Any]]:
+    """Measure VideoWriter.write() throughput per codec."""
+    rows = []
+    height, width = samples[0].shape[:2]
+    fps = cam.settings["fps"]
+    extensions = dict(CODEC_CANDIDATES)
+    for fourcc in codecs:
+        path = output_dir / f"bench_{fourcc}{extensions.get(fourcc, '.avi')}"
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+        if not writer.isOpened():
+            rows.append(_row(cam.camera_id, (width, height), "video", fourcc, 0, 0.0, 0.0,
+                             error="codec unavailable"))
+            continue
+
+        latencies = []
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        for i in range(frames):
+            t0 = time.perf_counter()
+            writer.write(samples[i % len(samples)])
+            latencies.append(time.perf_counter() - t0)
+        writer.release()
+        wall = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        rows.append(_row(cam.camera_id, (width, height), "video", fourcc, frames, wall,
+                         cpu, latencies, file_bytes=path.stat().st_size))
+    return rows
+
+
+def run_benchmarks(sources: List[Union[int, str]],
+                   resolutions: List[Tuple[int, int]] = RESOLUTIONS,
+                   photo_formats: List[str] = PHOTO_FORMATS,
+                   video_codecs: List[str] = VIDEO_CODECS,
+                   frames: int = 120, photos: int = 10) -> Dict[str, Any]:
+    """
+    Run the full benchmark matrix.
+
+    Args:
+        sources: Camera IDs or source specs (see sources.py)
+        resolutions: Resolutions to request from each source
+        photo_formats: Photo formats to encode
+        video_codecs: Writer fourccs to test
+        frames: Frames to capture and to write per codec
+        photos: Photos to encode per format
+
+    Returns:
+        Dictionary with environment info and a list of result rows
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="simple-camera-bench-") as tmp_dir:
+        output_dir = Path(tmp_dir)
+        for source in sources:
+            for resolution in resolutions:
+                label = f"{source} @ {resolution[0]}x{resolution[1]}"
+                cam = Camera(source)
+                if not cam.open():
+                    print(f"Warning: Could not open {source}, skipping")
+                    results.append(_row(source, resolution, "capture", "read", 0, 0.0, 0.0,
+                                        error="could not open source"))
+                    break
+                try:
+                    cam.update_settings(resolution=resolution)
+                    print(f"Benchmarking {label}...")
+                    row, samples = bench_capture(cam, frames)
+                    results.append(row)
+                    if not samples:
+                        continue
+                    results.extend(bench_photos(cam, samples, photo_formats, photos, output_dir))
+                    results.extend(bench_video(cam, samples, video_codecs, frames, output_dir))
+                finally:
+                    cam.close()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "opencv": cv2.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "results": results,
+    }
+
+
+def format_table(report: Dict[str, Any]) -> str:
+    """Render benchmark results as a human-readable table."""
+    header = ["source", "resolution", "stage", "variant", "fps", "p50_ms", "p99_ms", "cpu_percent"]
+    titles = ["Source", "Resolution", "Stage", "Variant", "FPS", "p50 ms", "p99 ms", "CPU %", "Note"]
+    lines = []
+    for row in report["results"]:
+        if "error" in row:
+            cells = [row["source"], row["resolution"], row["stage"], row["variant"],
+                     "-", "-", "-", "-", row["error"]]
+        else:
+            cells = [row[key] if isinstance(row[key], str) else f"{row[key]:.1f}"
+                     for key in header] + [""]
+        lines.append(cells)
+
+    widths = [max(len(titles[i]), *(len(cells[i]) for cells in lines)) if lines else len(titles[i])
+              for i in range(len(titles))]
+    rule = "  ".join("-" * w for w in widths)
+    out = ["  ".join(t.ljust(w) for t, w in zip(titles, widths)).rstrip(), rule]
+    for cells in lines:
+        out.append("  ".join(c.ljust(w) for c, w in zip(cells, widths)).rstrip())
+    return "\n".join(out)
+
+
+def save_report(report: Dict[str, Any], filepath: str):
+    """Write the benchmark report as JSON."""
+    with open(filepath, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results saved to {filepath}")
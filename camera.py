@@ -5,26 +5,1853 @@ A Python module for capturing photos and recording videos using OpenCV.
 """
 
 import cv2
+import hashlib
 import json
 import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable, Tuple, Union
+
+import numpy as np
+
+from audio import AudioRecorder
+from metrics import PipelineMetrics, format_metrics
+from sources import open_source
+from tracing import TRACER, GRAB, RETRIEVE, READ, ENCODE, WRITE
+
+
+class Frame:
+    """A captured frame together with its sequence number and timestamp."""
+
+    __slots__ = ("seq", "timestamp", "image", "_pool", "_refs")
+
+    def __init__(self, seq: int, timestamp: float, image, pool: Optional["FramePool"] = None):
+        """
+        Initialize the frame.
+
+        Args:
+            seq: Monotonically increasing frame sequence number (starts at 1)
+            timestamp: time.monotonic() value taken when the frame was grabbed
+            image: The BGR image as a numpy array
+            pool: Pool the image buffer is leased from, if any
+        """
+        self.seq = seq
+        self.timestamp = timestamp
+        self.image = image
+        self._pool = pool
+        self._refs = 1
+
+    def retain(self) -> "Frame":
+        """
+        Take an additional reference so the buffer is not recycled.
+
+        Returns:
+            The frame itself, for chaining
+        """
+        if self._pool is not None:
+            self._pool._retain(self)
+        return self
+
+    def release(self):
+        """
+        Drop a reference to the frame.
+
+        When the last reference is dropped the image buffer goes back to its
+        pool and must not be used any more.
+        """
+        if self._pool is not None:
+            self._pool._release(self)
+
+
+class FramePool:
+    """
+    Pool of reusable image buffers for cap.read()/retrieve().
+
+    Buffers are leased out wrapped in reference-counted Frame objects and
+    come back to the pool when the last holder releases them, so steady-state
+    capture does not allocate a new array per frame.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], max_free: int = 8):
+        """
+        Initialize the pool.
+
+        Args:
+            shape: Buffer shape, usually (height, width, 3)
+            max_free: Maximum number of idle buffers kept for reuse
+        """
+        self.shape = tuple(shape)
+        self.max_free = max_free
+        self.allocations = 0
+
+        self._free: List[np.ndarray] = []
+        self._lock = threading.Lock()
+        self._allocation_times = deque(maxlen=1024)
+
+    def _count_allocation(self):
+        """Record that a new buffer was allocated."""
+        self.allocations += 1
+        self._allocation_times.append(time.monotonic())
+
+    def acquire(self) -> np.ndarray:
+        """
+        Lease a buffer, allocating a new one only if none is free.
+
+        Returns:
+            A uint8 array of the pool's shape
+        """
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self._count_allocation()
+        return np.empty(self.shape, dtype=np.uint8)
+
+    def give_back(self, image: np.ndarray):
+        """Return a leased buffer that was never wrapped in a Frame."""
+        with self._lock:
+            if image.shape == self.shape and len(self._free) < self.max_free:
+                self._free.append(image)
+
+    def resize(self, shape: Tuple[int, ...]):
+        """Change the buffer shape, dropping idle buffers of the old size."""
+        with self._lock:
+            if tuple(shape) != self.shape:
+                self.shape = tuple(shape)
+                self._free.clear()
+
+    def read(self, read: Callable) -> Optional[np.ndarray]:
+        """
+        Run a cv2-style read function into a leased buffer.
+
+        Args:
+            read: Callable taking the destination buffer and returning
+                  (ret, image), e.g. cap.read or cap.retrieve
+
+        Returns:
+            The filled image, or None if the read failed
+        """
+        buf = self.acquire()
+        ret, image = read(buf)
+        if not ret or image is None:
+            self.give_back(buf)
+            return None
+
+        if image is not buf:
+            # The device delivered a different size than negotiated; OpenCV
+            # allocated a fresh array, so size future buffers to match it
+            self.resize(image.shape)
+            with self._lock:
+                self._count_allocation()
+        return image
+
+    def wrap(self, seq: int, timestamp: float, image: np.ndarray) -> Frame:
+        """Wrap a leased buffer in a Frame holding one reference."""
+        return Frame(seq, timestamp, image, pool=self)
+
+    def _retain(self, frame: Frame):
+        with self._lock:
+            frame._refs += 1
+
+    def _release(self, frame: Frame):
+        with self._lock:
+            frame._refs -= 1
+            if frame._refs > 0:
+                return
+            image = frame.image
+            frame.image = None
+            frame._pool = None
+            if image.shape == self.shape and len(self._free) < self.max_free:
+                self._free.append(image)
+
+    def allocations_per_second(self, window: float = 1.0) -> float:
+        """
+        Get the recent buffer allocation rate.
+
+        Args:
+            window: Length of the trailing window in seconds
+
+        Returns:
+            Allocations per second over the window (0.0 in steady state)
+        """
+        cutoff = time.monotonic() - window
+        with self._lock:
+            recent = sum(1 for t in self._allocation_times if t >= cutoff)
+        return recent / window
+
+
+# Policies for a full FrameQueue
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+
+
+class FrameQueue:
+    """
+    Bounded frame queue with a policy for what happens when it is full.
+
+    The queue owns one reference to every frame it holds: frames that are
+    dropped are released by the queue, frames handed out by get() must be
+    released by the consumer.
+    """
+
+    def __init__(self, name: str, maxsize: int = 2, policy: str = DROP_OLDEST,
+                 block_timeout: Optional[float] = None):
+        """
+        Initialize the queue.
+
+        Args:
+            name: Name used to identify the consumer
+            maxsize: Maximum number of frames waiting in the queue
+            policy: DROP_OLDEST, DROP_NEWEST or BLOCK
+            block_timeout: With BLOCK, how long put() waits for space before
+                           dropping the frame (None waits until closed)
+        """
+        if policy not in (DROP_OLDEST, DROP_NEWEST, BLOCK):
+            raise ValueError(f"Unknown queue policy: {policy}")
+
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+
+        self._frames = deque()
+        self._cond = threading.Condition()
+
+    def qsize(self) -> int:
+        """Number of frames waiting in the queue."""
+        return len(self._frames)
+
+    def put(self, frame: Frame) -> bool:
+        """
+        Offer a frame to the queue, applying the full-queue policy.
+
+        Args:
+            frame: Frame whose reference is handed over to the queue
+
+        Returns:
+            True if the frame was queued, False if it was dropped (in which
+            case the caller still owns its reference)
+        """
+        with self._cond:
+            if self.closed:
+                return False
+
+            if len(self._frames) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                if self.policy == DROP_OLDEST:
+                    self._frames.popleft().release()
+                    self.dropped += 1
+                elif not self._cond.wait_for(
+                    lambda: len(self._frames) < self.maxsize or self.closed,
+                    self.block_timeout
+                ) or self.closed:
+                    self.dropped += 1
+                    return False
+
+            self._frames.append(frame)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Frame]:
+        """
+        Take the oldest frame from the queue.
+
+        Frames queued before close() are still handed out, so consumers can
+        drain the queue after it is closed.
+
+        Args:
+            timeout: Maximum time to wait for a frame (None waits forever)
+
+        Returns:
+            The frame, or None on timeout or once the queue is closed and empty
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._frames or self.closed, timeout
+            ) or not self._frames:
+                return None
+            frame = self._frames.popleft()
+            self.delivered += 1
+            self._cond.notify_all()
+            return frame
+
+    def close(self):
+        """Stop accepting frames and wake up any waiting producer or consumer."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def clear(self) -> int:
+        """
+        Release all frames still waiting in the queue.
+
+        Returns:
+            The number of frames that were discarded
+        """
+        with self._cond:
+            count = len(self._frames)
+            while self._frames:
+                self._frames.popleft().release()
+            self._cond.notify_all()
+            return count
+
+
+class FrameHub:
+    """
+    Publish/subscribe fan-out of captured frames.
+
+    A single capture thread publishes every frame once; each subscriber gets
+    it through its own FrameQueue, so a slow consumer only fills (and drops
+    from) its own queue instead of stalling the others.
+    """
+
+    def __init__(self):
+        """Initialize the hub with no subscribers."""
+        self._queues: List[FrameQueue] = []
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> List[FrameQueue]:
+        """Snapshot of the currently attached queues."""
+        with self._lock:
+            return list(self._queues)
+
+    def subscribe(self, name: str, depth: int = 2, policy: str = DROP_OLDEST,
+                  block_timeout: Optional[float] = None) -> FrameQueue:
+        """
+        Create a queue and attach it to the hub.
+
+        Args:
+            name: Name used to identify the consumer
+            depth: Maximum number of frames waiting for this consumer
+            policy: DROP_OLDEST, DROP_NEWEST or BLOCK
+            block_timeout: With BLOCK, how long to wait before dropping
+
+        Returns:
+            The new subscriber queue
+        """
+        queue = FrameQueue(name, depth, policy, block_timeout)
+        self.attach(queue)
+        return queue
+
+    def attach(self, queue: FrameQueue):
+        """Attach an existing queue to the hub."""
+        with self._lock:
+            # Blocking subscribers go last so they never delay delivery to
+            # the drop-policy ones
+            self._queues.append(queue)
+            self._queues.sort(key=lambda q: q.policy == BLOCK)
+
+    def unsubscribe(self, queue: FrameQueue):
+        """
+        Detach a queue from the hub and close it.
+
+        Frames already queued stay available to the consumer until drained.
+        """
+        with self._lock:
+            if queue in self._queues:
+                self._queues.remove(queue)
+        queue.close()
+
+    def publish(self, frame: Frame):
+        """
+        Deliver a frame to every subscriber.
+
+        Args:
+            frame: The frame to publish; the caller keeps its own reference
+        """
+        with self._lock:
+            queues = list(self._queues)
+
+        for queue in queues:
+            frame.retain()
+            if not queue.put(frame):
+                frame.release()
+
+    def close(self):
+        """Detach and close all subscriber queues."""
+        with self._lock:
+            queues = self._queues
+            self._queues = []
+        for queue in queues:
+            queue.close()
+
+
+class FrameGrabber:
+    """
+    Background thread that continuously grabs frames from a capture device.
+
+    Frames are kept in a fixed-size ring buffer so consumers can either take
+    the most recent frame or walk the stream in order at their own pace,
+    while the device keeps being drained at its native frame rate.
+    """
+
+    def __init__(self, cap, buffer_size: int = 4, lock: Optional[threading.RLock] = None,
+                 pool: Optional[FramePool] = None, hub: Optional[FrameHub] = None,
+                 metrics: Optional[PipelineMetrics] = None):
+        """
+        Initialize the grabber.
+
+        Args:
+            cap: An opened cv2.VideoCapture (or compatible) object
+            buffer_size: Number of frames kept in the ring buffer
+            lock: Lock guarding access to the capture device
+            pool: Buffer pool frames are retrieved into
+            hub: Hub every captured frame is published to
+            metrics: Metrics that count captured frames and failures
+        """
+        self.cap = cap
+        self.buffer_size = max(1, buffer_size)
+        self.lock = lock or threading.RLock()
+        self.pool = pool
+        self.hub = hub
+        self.metrics = metrics
+        self.failures = 0
+
+        self._ring: List[Optional[Frame]] = [None] * self.buffer_size
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the grabber thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the most recent frame (0 if none yet)."""
+        return self._seq
+
+    def start(self):
+        """Start the grabber thread."""
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="FrameGrabber", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the grabber thread and wake up any waiting consumers."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+        # Hand the ring's references back to the pool
+        with self._cond:
+            for i, frame in enumerate(self._ring):
+                if frame is not None:
+                    frame.release()
+                    self._ring[i] = None
+
+    def _retrieve(self) -> Optional[np.ndarray]:
+        """Retrieve the grabbed frame, into a pooled buffer if available."""
+        if self.pool:
+            return self.pool.read(self.cap.retrieve)
+        ok, image = self.cap.retrieve()
+        return image if ok else None
+
+    def _run(self):
+        """Grab/retrieve loop running in the background thread."""
+        while not self._stop.is_set():
+            image = None
+            with self.lock:
+                if TRACER.enabled:
+                    t0 = time.monotonic_ns()
+                ok = self.cap.grab()
+                timestamp = time.monotonic()
+                if TRACER.enabled:
+                    TRACER.span(GRAB, self._seq + 1, t0)
+                    t0 = time.monotonic_ns()
+                if ok:
+                    image = self._retrieve()
+                    if TRACER.enabled:
+                        TRACER.span(RETRIEVE, self._seq + 1, t0)
+
+            if image is None:
+                self.failures += 1
+                if self.metrics:
+                    self.metrics.read_failed()
+                # Avoid spinning on a device that stopped delivering frames
+                self._stop.wait(0.01)
+                continue
+
+            with self._cond:
+                seq = self._seq + 1
+                if self.pool:
+                    frame = self.pool.wrap(seq, timestamp, image)
+                else:
+                    frame = Frame(seq, timestamp, image)
+                slot = seq % self.buffer_size
+                if self._ring[slot] is not None:
+                    self._ring[slot].release()
+                self._ring[slot] = frame
+                self._seq = seq
+                self._cond.notify_all()
+
+            if self.metrics:
+                self.metrics.frame_read(timestamp)
+
+            if self.hub:
+                self.hub.publish(frame)
+
+    def latest(self) -> Optional[Frame]:
+        """
+        Get the most recent frame.
+
+        The returned frame is retained for the caller, who must call
+        release() on it when done.
+
+        Returns:
+            The newest frame, or None if nothing has been captured yet
+        """
+        with self._cond:
+            if self._seq == 0:
+                return None
+            return self._ring[self._seq % self.buffer_size].retain()
+
+    def frame_at(self, timestamp: float) -> Optional[Frame]:
+        """
+        Get the buffered frame captured closest to a point in time.
+
+        The returned frame is retained for the caller, who must call
+        release() on it when done.
+
+        Args:
+            timestamp: time.monotonic() value to match, e.g. when a shutter
+                       button was pressed
+
+        Returns:
+            The nearest frame in the ring buffer, or None if it is empty
+        """
+        with self._cond:
+            frames = [frame for frame in self._ring if frame is not None]
+            if not frames:
+                return None
+            nearest = min(frames, key=lambda frame: abs(frame.timestamp - timestamp))
+            return nearest.retain()
+
+    def next_frame(self, after_seq: int, timeout: Optional[float] = 1.0) -> Optional[Frame]:
+        """
+        Get the oldest buffered frame newer than a sequence number.
+
+        If the consumer fell behind by more than the ring size, the oldest
+        frame still in the buffer is returned; the gap in sequence numbers
+        tells the caller how many frames were skipped. The returned frame is
+        retained for the caller, who must call release() on it when done.
+
+        Args:
+            after_seq: Sequence number of the last frame the caller has seen
+            timeout: Maximum time to wait for a new frame (None waits forever)
+
+        Returns:
+            The next frame, or None on timeout or when the grabber stops
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._seq > after_seq or self._stop.is_set(), timeout
+            ):
+                return None
+            if self._seq <= after_seq:
+                return None
+            seq = max(after_seq + 1, self._seq - self.buffer_size + 1)
+            return self._ring[seq % self.buffer_size].retain()
+
+
+class PhotoEncoder:
+    """
+    Bounded thread pool that encodes and writes photos in the background.
+
+    cv2.imwrite releases the GIL while encoding, so several photos can be
+    encoded in parallel while the caller goes back to capturing.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 8,
+                 metrics: Optional[PipelineMetrics] = None):
+        """
+        Initialize the encoder.
+
+        Args:
+            workers: Number of encoding threads
+            max_pending: Maximum number of photos queued or being encoded;
+                         submit() blocks once this many are in flight
+            metrics: Metrics that count the bytes written
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.metrics = metrics
+        self.completed = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=256)
+
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="PhotoEncoder")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures = set()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of photos queued or being encoded."""
+        with self._lock:
+            return len(self._futures)
+
+    def submit(self, frame: Frame, filepath: Path, params: Optional[List[int]] = None) -> Future:
+        """
+        Queue a frame for encoding.
+
+        Blocks while max_pending photos are already in flight.
+
+        Args:
+            frame: Frame to encode; its reference is handed over to the encoder
+            filepath: Destination path (the extension selects the format)
+            params: Optional cv2.imwrite parameters
+
+        Returns:
+            A future resolving to the saved path, or None if writing failed
+        """
+        self._slots.acquire()
+        future = self._executor.submit(self._encode, frame, filepath, params or [])
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _encode(self, frame: Frame, filepath: Path, params: List[int]) -> Optional[str]:
+        """Encode and write one photo on a worker thread."""
+        start = time.perf_counter()
+        seq = frame.seq
+        try:
+            # Encode and write separately so traces can tell them apart
+            if TRACER.enabled:
+                t0 = time.monotonic_ns()
+            ok, data = cv2.imencode(filepath.suffix, frame.image, params)
+            if TRACER.enabled:
+                TRACER.span(ENCODE, seq, t0)
+        except cv2.error as e:
+            print(f"Error: {e}")
+            ok = False
+        finally:
+            frame.release()
+
+        if ok:
+            if TRACER.enabled:
+                t0 = time.monotonic_ns()
+            try:
+                data.tofile(str(filepath))
+                if self.metrics:
+                    self.metrics.add_bytes(data.nbytes)
+            except OSError as e:
+                print(f"Error: {e}")
+                ok = False
+            if TRACER.enabled:
+                TRACER.span(WRITE, seq, t0)
+        self.latencies.append(time.perf_counter() - start)
+
+        if not ok:
+            self.failed += 1
+            print(f"Error: Failed to write photo: {filepath}")
+            return None
+        self.completed += 1
+        return str(filepath)
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get encoder statistics.
+
+        Returns:
+            Dictionary with queue depth, completed/failed counts and encode
+            latency (last, average and maximum, in milliseconds)
+        """
+        latencies = list(self.latencies)
+        return {
+            "pending": self.pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "encode_ms_last": latencies[-1] * 1000 if latencies else 0.0,
+            "encode_ms_avg": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "encode_ms_max": max(latencies) * 1000 if latencies else 0.0,
+        }
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for all queued photos to be written.
+
+        Args:
+            timeout: Maximum time to wait (None waits forever)
+
+        Returns:
+            True if nothing is pending any more
+        """
+        with self._lock:
+            futures = list(self._futures)
+        _, not_done = wait(futures, timeout)
+        return not not_done
+
+    def close(self):
+        """Write all pending photos and shut the worker threads down."""
+        self._executor.shutdown(wait=True)
+
+
+# Frame rate modes for recordings
+CFR = "cfr"
+VFR = "vfr"
+
+
+class FramePacer:
+    """
+    Maps captured frames onto the output frame timeline of a recording.
+
+    In constant frame rate (CFR) mode every output slot k covers the capture
+    time [start + (k - 0.5) / fps, start + (k + 0.5) / fps) on the monotonic
+    clock.
+    Frames landing in an already filled slot are dropped, and empty slots
+    are filled by repeating the previous frame, so the clip plays back for
+    exactly as long as it was recorded. In variable frame rate (VFR) mode
+    every frame is written and its capture timestamp is recorded instead.
+    """
+
+    def __init__(self, writer, fps: float, mode: str = CFR,
+                 metrics: Optional[PipelineMetrics] = None):
+        """
+        Initialize the pacer.
+
+        Args:
+            writer: Object with a write(image) method (e.g. cv2.VideoWriter)
+            fps: Declared frame rate of the output
+            mode: CFR or VFR
+            metrics: Metrics that count written frames and encode latency
+        """
+        if mode not in (CFR, VFR):
+            raise ValueError(f"Unknown frame rate mode: {mode}")
+
+        self.writer = writer
+        self.fps = fps
+        self.mode = mode
+        self.metrics = metrics
+        self.start: Optional[float] = None
+        self.limit: Optional[float] = None
+        self.captured = 0
+        self.written = 0
+        self.duplicated = 0
+        self.dropped = 0
+        self.timestamps: List[float] = []
+
+        # Source frame and capture time of every output frame, kept in
+        # compact arrays for the recording index
+        self.frame_seqs = array('q')
+        self.frame_times = array('d')
+        self._last: Optional[Frame] = None
+
+    def write(self, frame: Frame):
+        """
+        Write a captured frame according to the frame rate mode.
+
+        Args:
+            frame: The frame to write; the caller keeps its reference
+        """
+        if self.start is None:
+            self.start = frame.timestamp
+        if self.limit is not None and frame.timestamp - self.start >= self.limit:
+            # Past the requested recording length
+            return
+        self.captured += 1
+
+        if self.mode == VFR:
+            self._write(frame)
+            self.written += 1
+            self.timestamps.append(frame.timestamp - self.start)
+            return
+
+        # Nearest slot: frames arrive right on slot boundaries (the timeline
+        # starts at the first one), so truncating would let normal timing
+        # jitter push them back and forth between neighbouring slots
+        slot = int((frame.timestamp - self.start) * self.fps + 0.5)
+        if slot < self.written:
+            # The slot this frame belongs to already has a frame
+            self.dropped += 1
+            return
+
+        self._fill(slot)
+        self._write(frame)
+        self.written += 1
+
+        if self._last is not None:
+            self._last.release()
+        self._last = frame.retain()
+
+    def _fill(self, slots: int):
+        """Repeat the previous frame until `slots` frames have been written."""
+        if self._last is None:
+            return
+        while self.written < slots:
+            self._write(self._last)
+            self.written += 1
+            self.duplicated += 1
+
+    def _write(self, frame: Frame):
+        """Encode one frame into the output."""
+        t0 = time.monotonic_ns()
+        self.writer.write(frame.image)
+        self.frame_seqs.append(frame.seq)
+        self.frame_times.append(frame.timestamp)
+        if TRACER.enabled:
+            TRACER.span(ENCODE, frame.seq, t0)
+        if self.metrics:
+            self.metrics.frame_written((time.monotonic_ns() - t0) / 1e9)
+
+    def finish(self, duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Pad the recording to its full length and compute statistics.
+
+        Args:
+            duration: Length of the recording in seconds; defaults to the
+                      time elapsed since the first frame
+
+        Returns:
+            Dictionary with frames captured, written, duplicated, dropped
+            and the achieved capture FPS
+        """
+        if duration is None:
+            duration = time.monotonic() - self.start if self.start is not None else 0.0
+
+        if self.mode == CFR:
+            self._fill(round(duration * self.fps))
+        if self._last is not None:
+            self._last.release()
+            self._last = None
+
+        return {
+            "mode": self.mode,
+            "fps": self.fps,
+            "duration": duration,
+            "captured": self.captured,
+            "written": self.written,
+            "duplicated": self.duplicated,
+            "dropped": self.dropped,
+            "achieved_fps": self.captured / duration if duration > 0 else 0.0,
+        }
+
+    def save_index(self, filepath: Path, audio: Optional[AudioRecorder] = None) -> Dict[str, Any]:
+        """
+        Write the recording index as a compressed NumPy .npz file.
+
+        The index has one row per output frame with the columns `frame`
+        (output frame number), `seq` (source frame sequence number),
+        `timestamp` (monotonic capture time in seconds) and `audio_sample`
+        (offset of that moment in the WAV file, -1 without audio), plus
+        scalar fields describing the clocks, so a muxer can align the
+        streams without analyzing them.
+
+        Args:
+            filepath: Output file
+            audio: The recording's audio recorder, if audio was captured
+
+        Returns:
+            Dictionary with the index path and the measured audio drift
+        """
+        timestamps = np.array(self.frame_times, dtype=np.float64)
+        count = len(timestamps)
+        audio_samples = np.full(count, -1, dtype=np.int64)
+        info: Dict[str, Any] = {"index_file": str(filepath)}
+        fields = {"fps": self.fps, "mode": self.mode,
+                  "start": self.start if self.start is not None else np.nan}
+
+        fit = audio.clock_fit() if audio is not None else None
+        if fit is not None:
+            rate, sample_zero = fit
+            audio_samples = audio.wav_offsets(np.rint((timestamps - sample_zero) * rate))
+            # Positive drift: the audio clock runs fast against the monotonic
+            # clock; the offset is how much longer the audio is than the video
+            drift_ppm = (rate / audio.rate - 1) * 1e6
+            offset = audio.frames_stored / audio.rate - self.written / self.fps
+            fields.update(audio_rate=audio.rate, audio_measured_rate=rate,
+                          audio_start=sample_zero, audio_drift_ppm=drift_ppm,
+                          audio_video_offset=offset)
+            info.update(audio_drift_ppm=drift_ppm, audio_video_offset=offset)
+
+        with open(filepath, 'wb') as f:
+            np.savez_compressed(
+                f, frame=np.arange(count, dtype=np.int64),
+                seq=np.array(self.frame_seqs, dtype=np.int64),
+                timestamp=timestamps, audio_sample=audio_samples, **fields
+            )
+        return info
+
+    def save_timestamps(self, filepath: Path):
+        """
+        Write per-frame capture timestamps in timecode v2 format.
+
+        The file can be passed to mkvmerge --timestamps to remux a VFR
+        recording with its real frame timing.
+        """
+        with open(filepath, 'w') as f:
+            f.write("# timecode format v2\n")
+            for timestamp in self.timestamps:
+                f.write(f"{timestamp * 1000:.3f}\n")
+
+
+class SegmentedWriter:
+    """
+    Video writer that rolls over to a new file every N seconds or megabytes.
+
+    Behaves like a cv2.VideoWriter for FramePacer. The next segment's writer
+    is opened on a background thread as soon as the current one starts, and
+    finished segments are released (which writes the MP4 index) in the
+    background as well, so switching files never holds up a frame. Every
+    closed segment is added to a JSON manifest right away, so if the
+    process dies only the segment in progress is lost.
+    """
+
+    def __init__(self, base_path: Path, open_writer: Callable[[Path], Any], fps: float,
+                 seconds: float = 0, megabytes: float = 0,
+                 frame_times: Optional[array] = None,
+                 metrics: Optional[PipelineMetrics] = None):
+        """
+        Initialize the writer and open the first segment.
+
+        Args:
+            base_path: Recording path; segments are named <stem>_000<ext>, ...
+            open_writer: Opens a cv2.VideoWriter (or compatible) for a path
+            fps: Declared frame rate, used to turn seconds into frames
+            seconds: Segment length in seconds (0 for no time limit)
+            megabytes: Segment size limit in MB (0 for no size limit)
+            frame_times: Capture timestamp of every output frame so far, as
+                         kept by FramePacer.frame_times
+            metrics: Metrics that track the bytes of each segment
+        """
+        self.base_path = Path(base_path)
+        self.open_writer = open_writer
+        self.fps = fps
+        self.max_frames = int(round(seconds * fps)) if seconds > 0 else 0
+        self.max_bytes = int(megabytes * 1e6) if megabytes > 0 else 0
+        self.frame_times = frame_times if frame_times is not None else array('d')
+        self.metrics = metrics
+        self.manifest_path = self.base_path.with_suffix(".segments.json")
+        self.segments: List[Dict[str, Any]] = []
+        self.frames = 0
+
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="SegmentWriter")
+        self._releases: List[Future] = []
+        self._index = 0
+        self._first_frame = 0
+        self._path = self._segment_path(0)
+        self._writer = open_writer(self._path)
+        self._next: Optional[Future] = None
+        if self.isOpened():
+            self._track(self._path)
+            self._prepare_next()
+
+    def _segment_path(self, index: int) -> Path:
+        """Path of the segment with the given number."""
+        return self.base_path.with_name(f"{self.base_path.stem}_{index:03d}{self.base_path.suffix}")
+
+    def _prepare_next(self):
+        """Start opening the writer for the following segment."""
+        path = self._segment_path(self._index + 1)
+        self._next = self._executor.submit(lambda: (path, self.open_writer(path)))
+
+    def _track(self, path: Path):
+        """Count the growing size of a segment in the metrics."""
+        if self.metrics:
+            self.metrics.track_file(path)
+
+    def isOpened(self) -> bool:
+        """Whether the current segment's writer is open."""
+        return self._writer is not None and self._writer.isOpened()
+
+    def _segment_full(self) -> bool:
+        """Whether the current segment has reached its length or size limit."""
+        frames = self.frames - self._first_frame
+        if self.max_frames and frames >= self.max_frames:
+            return True
+        # Checking the size once a second is plenty
+        if self.max_bytes and frames and frames % max(1, int(self.fps)) == 0:
+            try:
+                return self._path.stat().st_size >= self.max_bytes
+            except OSError:
+                return False
+        return False
+
+    def write(self, image: np.ndarray):
+        """Write a frame, switching to the next segment first if this one is full."""
+        if self._segment_full():
+            self._roll()
+        self._writer.write(image)
+        self.frames += 1
+
+    def _roll(self):
+        """Swap in the pre-opened writer and finish the current segment."""
+        if not self._next.done():
+            # Still opening; keep writing this segment and try on the next frame
+            return
+        path, writer = self._next.result()
+        if not writer.isOpened():
+            # Keep writing the current segment rather than lose frames
+            print(f"Error: Could not open next segment {path}")
+            self._prepare_next()
+            return
+
+        self._close_segment()
+        self._releases.append(self._executor.submit(self._finish, self._writer, self._path))
+        self._writer, self._path = writer, path
+        self._index += 1
+        self._first_frame = self.frames
+        self._track(path)
+        self._prepare_next()
+
+    def _finish(self, writer, path: Path):
+        """Release a finished segment's writer and count its size."""
+        writer.release()
+        if self.metrics:
+            self.metrics.add_bytes(path.stat().st_size if path.exists() else 0)
+
+    def _close_segment(self):
+        """Add the current segment to the manifest."""
+        first, last = self._first_frame, self.frames - 1
+        self.segments.append({
+            "file": self._path.name,
+            "index": self._index,
+            "first_frame": first,
+            "last_frame": last,
+            "frames": last - first + 1,
+            "start_time": self.frame_times[first] if first < len(self.frame_times) else None,
+            "end_time": self.frame_times[last] if last < len(self.frame_times) else None,
+        })
+        self._save_manifest()
+
+    def _save_manifest(self):
+        """Write the manifest of closed segments."""
+        start = self.frame_times[0] if len(self.frame_times) else None
+        manifest = {"fps": self.fps, "start_time": start, "segments": self.segments}
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def release(self):
+        """
+        Close the last segment and discard the unused pre-opened writer.
+
+        The last segment stays tracked in the metrics; the caller counts it
+        with PipelineMetrics.finish_file() as for a single-file recording.
+        """
+        if self._writer is not None:
+            # Stop pre-opening before touching the writers
+            if self._next is not None:
+                path, writer = self._next.result()
+                writer.release()
+                path.unlink(missing_ok=True)
+                self._next = None
+
+            wait(self._releases)
+            self._writer.release()
+            # Segments only roll over right before a frame, so the last one
+            # is empty only if nothing was recorded at all
+            if self.frames > self._first_frame:
+                self._close_segment()
+            self._writer = None
+        self._executor.shutdown()
+
+
+class VideoWriterThread:
+    """
+    Dedicated thread that writes recorded frames from a bounded queue.
+
+    Decouples encoding and disk I/O from the capture loop: a slow write
+    (keyframe, disk flush) only fills the queue instead of delaying the next
+    read. What happens when the queue is full is set by its policy.
+    """
+
+    def __init__(self, sink: Callable[[Frame], None], queue: FrameQueue,
+                 prologue: Optional[Callable[[], int]] = None):
+        """
+        Initialize and start the writer thread.
+
+        Args:
+            sink: Function that writes one frame (e.g. FramePacer.write)
+            queue: Queue the frames to write arrive on
+            prologue: Run on the thread before the queue is drained (e.g.
+                      PreEventBuffer.replay); returns the frames it wrote
+        """
+        self.sink = sink
+        self.queue = queue
+        self.prologue = prologue
+        self.written = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.abandoned = False
+
+        self._on_exit: List[Callable[[], Any]] = []
+        self._exited = False
+        self._exit_lock = threading.Lock()
+
+        self._thread = threading.Thread(target=self._run, name="VideoWriter", daemon=True)
+        self._thread.start()
+
+    def put(self, frame: Frame) -> bool:
+        """
+        Queue a frame for writing.
+
+        Args:
+            frame: The frame to write; the caller keeps its reference
+
+        Returns:
+            True if the frame was queued, False if it was dropped
+        """
+        frame.retain()
+        if self.queue.put(frame):
+            return True
+        frame.release()
+        return False
+
+    def _error(self, error: Exception):
+        """Count a failed write; the thread keeps going."""
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        print(f"Error: Failed to write frame: {self.last_error}")
+
+    def _run(self):
+        """Write frames until the queue is closed and drained."""
+        try:
+            if self.prologue is not None:
+                try:
+                    self.written += self.prologue()
+                except Exception as e:
+                    self._error(e)
+            while True:
+                frame = self.queue.get(timeout=0.5)
+                if frame is None:
+                    if self.queue.closed:
+                        break
+                    continue
+                try:
+                    self.sink(frame)
+                    self.written += 1
+                except Exception as e:
+                    self._error(e)
+                finally:
+                    frame.release()
+        finally:
+            with self._exit_lock:
+                self._exited = True
+                callbacks = self._on_exit
+                self._on_exit = []
+            for callback in callbacks:
+                callback()
+
+    def when_done(self, callback: Callable[[], Any]) -> bool:
+        """
+        Run a callback once the thread has exited.
+
+        Args:
+            callback: Called on the writer thread as it exits, or right away
+                      if it already has
+
+        Returns:
+            True if the callback ran right away
+        """
+        with self._exit_lock:
+            if not self._exited:
+                self._on_exit.append(callback)
+                return False
+        callback()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get writer statistics.
+
+        Returns:
+            Dictionary with queue depth, capacity, policy, the number of
+            frames written and dropped, write errors (and the last one) and
+            whether stop() gave up waiting for the thread
+        """
+        return {
+            "queued": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "policy": self.queue.policy,
+            "written": self.written,
+            "dropped": self.queue.dropped,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "abandoned": self.abandoned,
+        }
+
+    def stop(self, timeout: Optional[float] = 5.0) -> int:
+        """
+        Stop accepting frames and drain the queue.
+
+        If the frame being written still has not finished after another
+        `timeout`, the thread is left to finish on its own and `abandoned`
+        is set; use when_done() to release what it is writing to.
+
+        Args:
+            timeout: Maximum time to wait for queued frames to be written
+
+        Returns:
+            Number of frames still pending at the timeout, which are discarded
+        """
+        self.queue.close()
+        self._thread.join(timeout)
+        pending = 0
+        if self._thread.is_alive():
+            pending = self.queue.clear()
+            # Only the frame currently being written is left
+            self._thread.join(timeout)
+            self.abandoned = self._thread.is_alive()
+        return pending
+
+
+# JPEG quality of frames held in the pre-event buffer
+PRE_EVENT_QUALITY = 90
+
+# Frames left in the pre-event buffer when the live stream is attached
+PRE_EVENT_HANDOVER = 2
+
+
+class PreEventBuffer:
+    """
+    Keeps the last few seconds of captured frames, JPEG-compressed in memory.
+
+    A feeder thread takes frames from a hub subscriber queue and hands them
+    to a small pool of encoder threads (cv2.imencode releases the GIL), so
+    the capture thread only pays for a queue put. Encoded frames are stored
+    in capture order and the oldest are evicted once the buffer spans more
+    than `seconds` or holds more than `max_bytes`.
+
+    When a recording starts, replay() runs on the video writer thread: it
+    decodes and writes the buffered frames while the buffer keeps filling,
+    attaches the live queue once it has nearly caught up and then writes
+    only what was captured before that point, so the recording continues
+    without a gap or a repeated frame. While replaying, frames that do not
+    fit under the memory ceiling are dropped as they arrive rather than
+    evicting the ones due to be written next.
+    """
+
+    def __init__(self, queue: FrameQueue, seconds: float, max_bytes: int,
+                 detach: Optional[Callable[[FrameQueue], None]] = None,
+                 quality: int = PRE_EVENT_QUALITY, workers: int = 2):
+        """
+        Initialize the buffer and start filling it.
+
+        Args:
+            queue: Hub subscriber queue the frames arrive on
+            seconds: How much video to keep
+            max_bytes: Memory ceiling for the compressed frames
+            detach: Called with the queue on stop() (e.g. Camera.unsubscribe)
+            quality: JPEG quality (0-100)
+            workers: Number of encoder threads
+        """
+        self.queue = queue
+        self.seconds = seconds
+        self.max_bytes = max_bytes
+        self.detach = detach
+        self.workers = workers
+        self.bytes = 0
+        self.evicted = 0
+        self.failed = 0
+        self.replay_dropped = 0
+        self.replay_discarded = 0
+
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        # (seq, timestamp, JPEG data) in capture order
+        self._entries: deque = deque()
+        self._seen = 0
+        self._replaying = False
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="PreEventEncoder")
+        self._thread = threading.Thread(target=self._run, name="PreEventBuffer", daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        """Number of frames in the buffer."""
+        return len(self._entries)
+
+    def _encode(self, frame: Frame) -> Optional[np.ndarray]:
+        """Compress one frame on an encoder thread."""
+        try:
+            if TRACER.enabled:
+                t0 = time.monotonic_ns()
+            ok, data = cv2.imencode(".jpg", frame.image, self._params)
+            if TRACER.enabled:
+                TRACER.span(ENCODE, frame.seq, t0)
+        except cv2.error as e:
+            print(f"Error: {e}")
+            ok = False
+        finally:
+            frame.release()
+        return data if ok else None
+
+    def _run(self):
+        """Feed frames to the encoders and store the results in order."""
+        pending: deque = deque()
+        while True:
+            frame = self.queue.get(timeout=0.1)
+            if frame is not None:
+                future = self._executor.submit(self._encode, frame)
+                pending.append((frame.seq, frame.timestamp, future))
+            elif self.queue.closed and not pending:
+                break
+            # Keep capture order; wait for the oldest encode only when too
+            # many are in flight or there is nothing else to do
+            while pending and (pending[0][2].done() or frame is None
+                               or len(pending) > self.workers * 2):
+                seq, timestamp, future = pending.popleft()
+                self._store(seq, timestamp, future.result())
+
+    def _store(self, seq: int, timestamp: float, data: Optional[np.ndarray]):
+        """Add an encoded frame and evict what no longer fits."""
+        with self._cond:
+            if data is None:
+                self.failed += 1
+            elif self._replaying and self.bytes + data.nbytes > self.max_bytes:
+                # The writer is behind capture; the oldest frames are the
+                # ones it needs next, so drop the newest instead
+                if not self.replay_dropped:
+                    print("Warning: Pre-event replay is behind capture, dropping frames")
+                self.replay_dropped += 1
+            else:
+                self._entries.append((seq, timestamp, data))
+                self.bytes += data.nbytes
+            # While replaying, frames leave through _take() only
+            while self._entries and not self._replaying and (
+                self.bytes > self.max_bytes or timestamp - self._entries[0][1] > self.seconds
+            ):
+                self.bytes -= self._entries.popleft()[2].nbytes
+                self.evicted += 1
+            self._seen = seq
+            self._cond.notify_all()
+
+    def begin_replay(self) -> Optional[float]:
+        """
+        Stop evicting frames by age ahead of replay().
+
+        Returns:
+            Capture timestamp of the oldest buffered frame, or None if empty
+        """
+        with self._cond:
+            self._replaying = True
+            return self._entries[0][1] if self._entries else None
+
+    def _take(self) -> Optional[Tuple[int, float, np.ndarray]]:
+        """Remove and return the oldest buffered entry, or None if empty."""
+        with self._cond:
+            if not self._entries:
+                return None
+            entry = self._entries.popleft()
+            self.bytes -= entry[2].nbytes
+            return entry
+
+    @staticmethod
+    def _decode(entry: Tuple[int, float, np.ndarray]) -> Optional[Frame]:
+        """Decompress one buffered entry into a (non-pooled) frame."""
+        seq, timestamp, data = entry
+        image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        return Frame(seq, timestamp, image)
+
+    def replay(self, sink: Callable[[Frame], None], live: FrameQueue,
+               attach: Callable[[FrameQueue], None], latest_seq: Callable[[], int],
+               drain_timeout: float = 5.0) -> int:
+        """
+        Write the buffered frames, then hand over to the live queue.
+
+        Frames are decoded a few ahead on the encoder threads. The buffer is
+        stopped and freed when this returns.
+
+        Args:
+            sink: Function that writes one frame (e.g. FramePacer.write)
+            live: Queue that will carry the live frames; it is attached once
+                  the buffer has nearly caught up
+            attach: Attaches the live queue to the hub
+            latest_seq: Returns the sequence number of the newest captured
+                        frame; every later frame reaches the live queue
+            drain_timeout: Once the live queue is closed (the recording was
+                           stopped), how long to keep writing buffered frames;
+                           the rest are discarded
+
+        Returns:
+            Number of frames written
+        """
+        self._replaying = True
+        decoding: deque = deque()
+        written = 0
+        last_seq = 0
+        deadline: Optional[float] = None
+
+        def decode_ahead(up_to: Optional[int] = None):
+            while len(decoding) <= self.workers:
+                entry = self._take()
+                if entry is None:
+                    return
+                # Frames after up_to arrive through the live queue
+                if up_to is None or entry[0] <= up_to:
+                    decoding.append(self._executor.submit(self._decode, entry))
+
+        def write_next() -> int:
+            nonlocal last_seq
+            frame = decoding.popleft().result()
+            if frame is None:
+                return 0
+            sink(frame)
+            last_seq = frame.seq
+            return 1
+
+        def out_of_time() -> bool:
+            # Stopping the recording closes the live queue; from then on
+            # only drain_timeout is left to write what is buffered
+            nonlocal deadline
+            if not live.closed:
+                return False
+            if deadline is None:
+                deadline = time.monotonic() + drain_timeout
+                self._stop_feeding()
+            return time.monotonic() >= deadline
+
+        try:
+            # Catch up with capture while the buffer keeps filling; a writer
+            # slower than capture never would, so hand over after at most
+            # the buffered span and let the live queue's policy take over
+            catch_up_until = time.monotonic() + self.seconds
+            while (len(self) + len(decoding) > PRE_EVENT_HANDOVER and not live.closed
+                   and time.monotonic() < catch_up_until):
+                decode_ahead()
+                written += write_next()
+
+            boundary = None
+            if not live.closed:
+                attach(live)
+                # Frames up to the boundary may have missed the live queue;
+                # wait for them to reach the buffer before feeding stops
+                boundary = latest_seq()
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seen >= boundary, 2.0)
+                self._stop_feeding()
+
+            decode_ahead(boundary)
+            while decoding and not out_of_time():
+                written += write_next()
+                decode_ahead(boundary)
+            self.replay_discarded = len(decoding) + len(self)
+            if self.replay_discarded:
+                print(f"Warning: {self.replay_discarded} pre-event frames were not "
+                      f"written within {drain_timeout}s")
+
+            # The frame at the boundary can be in both; skip live frames
+            # that were already written from the buffer
+            while boundary is not None:
+                frame = live.get(timeout=0.1)
+                if frame is None:
+                    if live.closed:
+                        break
+                    continue
+                try:
+                    if frame.seq > last_seq:
+                        sink(frame)
+                        written += 1
+                        break
+                finally:
+                    frame.release()
+        finally:
+            self.stop()
+        return written
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get buffer statistics.
+
+        Returns:
+            Dictionary with buffered frames, the seconds they span, bytes
+            used, frames evicted, dropped by the subscriber queue, frames
+            that failed to encode, and frames dropped because replay fell
+            behind or left unwritten when the recording stopped
+        """
+        with self._cond:
+            span = (self._entries[-1][1] - self._entries[0][1]) if self._entries else 0.0
+            frames = len(self._entries)
+        return {
+            "frames": frames,
+            "seconds": span,
+            "bytes": self.bytes,
+            "evicted": self.evicted,
+            "dropped": self.queue.dropped,
+            "failed": self.failed,
+            "replay_dropped": self.replay_dropped,
+            "replay_discarded": self.replay_discarded,
+        }
+
+    def _stop_feeding(self):
+        """Detach from the hub and wait for the frames in flight to be stored."""
+        if self._stopped:
+            return
+        self._stopped = True
+        if self.detach is not None:
+            self.detach(self.queue)
+        else:
+            self.queue.close()
+        self._thread.join()
+
+    def stop(self):
+        """Stop filling the buffer and free it."""
+        self._stop_feeding()
+        self._executor.shutdown()
+        with self._cond:
+            self._entries.clear()
+            self.bytes = 0
+
+
+# Bursts are buffered in memory only while their interval is shorter than
+# this and they fit in BURST_MAX_BYTES; others are encoded as they are taken
+BURST_MAX_INTERVAL = 1.0
+BURST_MAX_BYTES = 1 << 30
+
+# Seconds without a frame before record_video() reopens the device
+RECONNECT_AFTER = 2.0
+
+# Writer codecs in order of preference, with the container each one uses
+CODEC_CANDIDATES = [("avc1", ".mp4"), ("mp4v", ".mp4"), ("MJPG", ".avi")]
+CODEC_NAMES = {"avc1": "avc1 (H.264)"}
+
+# Settings that have to be pushed to the capture device when changed
+DEVICE_SETTINGS = ("resolution", "fps", "brightness", "contrast", "saturation")
+
+# Settings that resize the pre-event buffer (fixed while recording)
+PRE_EVENT_SETTINGS = ("pre_event_seconds", "pre_event_megabytes")
+
+
+@contextmanager
+def _quiet_stderr():
+    """
+    Discard everything written to the stderr file descriptor.
+
+    Native libraries (FFmpeg) log to fd 2 directly, past sys.stderr. This
+    affects the whole process, so only wrap short operations in it.
+    """
+    sys.stderr.flush()
+    try:
+        saved = os.dup(2)
+        devnull = os.open(os.devnull, os.O_WRONLY)
+    except OSError:
+        # No usable stderr to redirect; just run
+        yield
+        return
+    try:
+        os.dup2(devnull, 2)
+        yield
+    finally:
+        os.dup2(saved, 2)
+        os.close(saved)
+        os.close(devnull)
+
+
+class CodecCache:
+    """
+    Persistent cache of which writer codecs can actually be opened.
+
+    Opening a cv2.VideoWriter for an unsupported codec is slow and noisy,
+    so each fourcc/container combination is probed once per OpenCV build,
+    output container, resolution and frame rate, and the results are kept
+    on disk for later recordings.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache file location (default: ~/.cache/simple-camera/codecs.json)
+        """
+        if path is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+            path = Path(cache_home) / "simple-camera" / "codecs.json"
+        self.path = Path(path)
+        self._entries: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    _build_id: Optional[str] = None
+
+    @classmethod
+    def build_id(cls) -> str:
+        """Short hash identifying the OpenCV build (and its video backends)."""
+        if cls._build_id is None:
+            info = cv2.getBuildInformation().encode()
+            cls._build_id = hashlib.sha1(info).hexdigest()[:12]
+        return cls._build_id
+
+    def key(self, container: str, size: Tuple[int, int], fps: float) -> str:
+        """Build the cache key for a container, resolution and frame rate."""
+        width, height = size
+        return f"{self.build_id()}:{container}:{width}x{height}@{fps:g}"
+
+    def entries(self) -> Dict[str, Any]:
+        """Get all cached probe results, loading them from disk if needed."""
+        with self._lock:
+            if self._entries is None:
+                self._entries = {}
+                if self.path.exists():
+                    try:
+                        with open(self.path, 'r') as f:
+                            self._entries = json.load(f).get("entries", {})
+                    except (OSError, ValueError) as e:
+                        print(f"Warning: Ignoring unreadable codec cache {self.path}: {e}")
+            return self._entries
+
+    def save(self):
+        """
+        Write the cache to disk.
+
+        A cache that cannot be written is only a warning; the results stay
+        in memory for the rest of the session.
+        """
+        entries = self.entries()
+        tmp_path = self.path.with_suffix(".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump({"entries": entries}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save codec cache {self.path}: {e}")
+
+    def clear(self):
+        """Forget all probe results."""
+        with self._lock:
+            self._entries = {}
+        self.save()
+
+    def probe(self, container: str, size: Tuple[int, int], fps: float) -> List[Dict[str, Any]]:
+        """
+        Try to open a writer with every candidate codec and cache the results.
+
+        Args:
+            container: Requested output extension (e.g. ".mp4")
+            size: Frame size as (width, height)
+            fps: Frame rate
+
+        Returns:
+            List of {"fourcc", "ext", "ok"} dictionaries in preference order
+        """
+        results = []
+        # Failed opens are expected here; keep OpenCV from logging them, and
+        # FFmpeg too, which writes straight to stderr
+        logging = getattr(getattr(cv2, "utils", None), "logging", None)
+        log_level = logging.getLogLevel() if logging else None
+        if logging:
+            logging.setLogLevel(logging.LOG_LEVEL_SILENT)
+        try:
+            with _quiet_stderr(), tempfile.TemporaryDirectory(prefix="simple-camera-") as tmp_dir:
+                for fourcc, ext in CODEC_CANDIDATES:
+                    probe_path = Path(tmp_dir) / f"probe{ext}"
+                    writer = cv2.VideoWriter(
+                        str(probe_path), cv2.VideoWriter_fourcc(*fourcc), fps, size
+                    )
+                    results.append({"fourcc": fourcc, "ext": ext, "ok": writer.isOpened()})
+                    writer.release()
+        finally:
+            if logging:
+                logging.setLogLevel(log_level)
+
+        entries = self.entries()
+        with self._lock:
+            entries[self.key(container, size, fps)] = {
+                "build": self.build_id(),
+                "container": container,
+                "resolution": list(size),
+                "fps": fps,
+                "results": results,
+                "probed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+        self.save()
+        return results
+
+    def best(self, container: str, size: Tuple[int, int], fps: float,
+             refresh: bool = False) -> Optional[Tuple[str, str]]:
+        """
+        Get the preferred codec that is known to open, probing if needed.
+
+        Args:
+            container: Requested output extension (e.g. ".mp4")
+            size: Frame size as (width, height)
+            fps: Frame rate
+            refresh: Probe again even if a cached result exists
+
+        Returns:
+            (fourcc, extension) of the best working codec, or None if none works
+        """
+        entry = self.entries().get(self.key(container, size, fps))
+        if entry is None or refresh:
+            results = self.probe(container, size, fps)
+        else:
+            results = entry["results"]
+
+        for result in results:
+            if result["ok"]:
+                return result["fourcc"], result["ext"]
+        return None
+
+
+# VIDIOC_QUERYCAP ioctl and the capability bits we care about
+VIDIOC_QUERYCAP = 0x80685600
+V4L2_CAP_VIDEO_CAPTURE = 0x00000001
+V4L2_CAP_VIDEO_CAPTURE_MPLANE = 0x00001000
+V4L2_CAP_DEVICE_CAPS = 0x80000000
+
+# Seconds a camera inventory stays valid
+CAMERA_CACHE_TTL = 10.0
+_camera_cache: Dict[str, Any] = {"time": 0.0, "devices": None}
+
+
+def _v4l2_devices() -> Optional[List[Dict[str, Any]]]:
+    """
+    List V4L2 video nodes that can capture, without opening a stream.
+
+    Returns:
+        List of {"index", "path", "name"} dictionaries, or None when V4L2
+        sysfs is not available (non-Linux systems)
+    """
+    sysfs = Path("/sys/class/video4linux")
+    if not sysfs.is_dir():
+        return None
+
+    devices = []
+    for node in sorted(sysfs.glob("video*"), key=lambda p: int(p.name[5:] or 0)):
+        index = int(node.name[5:])
+        path = f"/dev/{node.name}"
+        try:
+            name = (node / "name").read_text().strip()
+        except OSError:
+            name = node.name
+
+        caps = _v4l2_capabilities(path)
+        if caps is None:
+            # No permission for the ioctl; modern drivers expose metadata
+            # nodes as a second interface index of the same device
+            try:
+                is_capture = int((node / "index").read_text()) == 0
+            except (OSError, ValueError):
+                is_capture = True
+        else:
+            is_capture = bool(caps & (V4L2_CAP_VIDEO_CAPTURE | V4L2_CAP_VIDEO_CAPTURE_MPLANE))
+
+        if is_capture:
+            devices.append({"index": index, "path": path, "name": name})
+    return devices
+
+
+def _v4l2_capabilities(path: str) -> Optional[int]:
+    """Query the V4L2 device capabilities of a video node (None on failure)."""
+    try:
+        import fcntl
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    except (ImportError, OSError):
+        return None
+    try:
+        buf = bytearray(104)  # struct v4l2_capability
+        fcntl.ioctl(fd, VIDIOC_QUERYCAP, buf)
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+    capabilities, device_caps = struct.unpack_from("II", buf, 84)
+    return device_caps if capabilities & V4L2_CAP_DEVICE_CAPS else capabilities
+
+
+def _camera_backends() -> List[int]:
+    """Get the capture backends worth probing on this platform."""
+    if sys.platform.startswith("linux"):
+        preferred = [cv2.CAP_V4L2]
+    elif sys.platform == "win32":
+        preferred = [cv2.CAP_MSMF, cv2.CAP_DSHOW]
+    elif sys.platform == "darwin":
+        preferred = [cv2.CAP_AVFOUNDATION]
+    else:
+        preferred = []
+
+    try:
+        available = set(cv2.videoio_registry.getCameraBackends())
+    except AttributeError:
+        available = set(preferred)
+    backends = [b for b in preferred if b in available]
+    return backends or [cv2.CAP_ANY]
+
+
+def _probe_camera(index: int, backend: int, results: Dict[Tuple[int, int], str]):
+    """Try to open a camera with one backend and record the backend name."""
+    cap = cv2.VideoCapture(index, backend)
+    try:
+        if cap.isOpened():
+            results[(index, backend)] = cap.getBackendName()
+    finally:
+        cap.release()
 
 
 class Camera:
     """A simple camera class for photo and video capture."""
 
-    def __init__(self, camera_id: int = 0):
+    def __init__(self, camera_id: Union[int, str] = 0):
         """
         Initialize the camera.
 
         Args:
-            camera_id: The camera device ID (0 for default camera)
+            camera_id: The camera device ID (0 for default camera), or a
+                       source spec such as "synthetic:1280x720@30" or
+                       "file:clip.mp4" (see sources.py)
         """
         self.camera_id = camera_id
         self.cap: Optional[cv2.VideoCapture] = None
+        self.grabber: Optional[FrameGrabber] = None
+        self.pool: Optional[FramePool] = None
+        self.hub = FrameHub()
         self.is_recording = False
+        self.video_writer: Optional[cv2.VideoWriter] = None
+        self.writer_thread: Optional[VideoWriterThread] = None
+        # Makes handing the writer's drops over to the metrics atomic for
+        # get_metrics(), so the dropped counter never goes backwards
+        self._writer_lock = threading.Lock()
+        self._recorder_queue: Optional[FrameQueue] = None
+        self._writer_stats: Dict[str, Any] = {}
+        self.photo_encoder: Optional[PhotoEncoder] = None
+        self.codec_cache = CodecCache()
+        self.metrics = PipelineMetrics()
+        self.recording_stats: Dict[str, Any] = {}
+        self._pacer: Optional[FramePacer] = None
+        self.audio_recorder: Optional[AudioRecorder] = None
+        self.pre_event: Optional[PreEventBuffer] = None
+        self._pre_event_lead = 0.0
+        # Guards replacing or handing over the pre-event buffer, which
+        # settings changes and start/stop_recording() may do from different
+        # threads
+        self._pre_event_lock = threading.RLock()
+        self._cap_lock = threading.RLock()
+        self._read_seq = 0
         self.output_dir = Path("./captures")
         self.output_dir.mkdir(exist_ok=True)
 
@@ -35,6 +1862,21 @@ class Camera:
             "photo_format": "png",
             "video_format": "avi",
             "video_codec": "XVID",
+            "frame_rate_mode": CFR,  # "cfr" or "vfr"
+            "writer_threaded": False,  # write frames on a background thread
+            "writer_queue_size": 60,
+            "writer_full_policy": BLOCK,  # "block", "drop_oldest" or "drop_newest"
+            "audio_enabled": False,  # record the microphone to a .wav next to the video
+            "audio_device": None,  # PyAudio input device index, None for default
+            "audio_rate": 44100,
+            "audio_channels": 1,
+            "audio_silence_pause": False,  # stop writing audio during silence
+            "audio_silence_db": -50.0,  # RMS level counted as silence
+            "audio_silence_seconds": 2.0,  # silence before writing pauses
+            "segment_seconds": 0,  # split recordings into files this long (0 = off)
+            "segment_megabytes": 0,  # or this large (0 = off)
+            "pre_event_seconds": 0,  # video kept from before recording starts (0 = off)
+            "pre_event_megabytes": 200,  # memory ceiling of the pre-event buffer
             "brightness": -1,  # -1 means default
             "contrast": -1,
             "saturation": -1,
@@ -47,7 +1889,7 @@ class Camera:
         Returns:
             True if camera opened successfully, False otherwise
         """
-        self.cap = cv2.VideoCapture(self.camera_id)
+        self.cap = open_source(self.camera_id)
         if not self.cap.isOpened():
             return False
 
@@ -55,29 +1897,245 @@ class Camera:
         self._apply_settings()
         return True
 
+    def _frame_shape(self) -> Tuple[int, int, int]:
+        """Get the (height, width, 3) shape of frames at the negotiated resolution."""
+        with self._cap_lock:
+            width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if width <= 0 or height <= 0:
+            width, height = self.settings["resolution"]
+        return (height, width, 3)
+
     def close(self):
         """Close the camera device."""
+        # Photos still being encoded must not be lost
+        if self.photo_encoder:
+            self.photo_encoder.close()
+            self.photo_encoder = None
+        self.stop_pre_event()
+        self.stop_grabber()
+        self.hub.close()
         if self.cap:
             self.cap.release()
             self.cap = None
 
+    def reconnect(self) -> bool:
+        """
+        Reopen the capture device after it stopped delivering frames.
+
+        A running grabber keeps going with the new device.
+
+        Returns:
+            True if the device opened again, False otherwise
+        """
+        with self._cap_lock:
+            if self.cap:
+                self.cap.release()
+            self.cap = open_source(self.camera_id)
+            if self.grabber:
+                self.grabber.cap = self.cap
+            opened = self.cap.isOpened()
+        self.metrics.reconnected()
+
+        if not opened:
+            print(f"Error: Could not reopen camera {self.camera_id}")
+            return False
+        self._apply_settings()
+        print(f"Warning: Camera {self.camera_id} reconnected")
+        return True
+
     def _apply_settings(self):
         """Apply current settings to the camera."""
         if not self.cap:
             return
 
-        width, height = self.settings["resolution"]
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        self.cap.set(cv2.CAP_PROP_FPS, self.settings["fps"])
+        with self._cap_lock:
+            width, height = self.settings["resolution"]
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cap.set(cv2.CAP_PROP_FPS, self.settings["fps"])
+
+            # Apply image adjustments if set
+            if self.settings["brightness"] != -1:
+                self.cap.set(cv2.CAP_PROP_BRIGHTNESS, self.settings["brightness"])
+            if self.settings["contrast"] != -1:
+                self.cap.set(cv2.CAP_PROP_CONTRAST, self.settings["contrast"])
+            if self.settings["saturation"] != -1:
+                self.cap.set(cv2.CAP_PROP_SATURATION, self.settings["saturation"])
+
+        # Size reusable frame buffers from the resolution the device accepted
+        if self.pool:
+            self.pool.resize(self._frame_shape())
+        else:
+            self.pool = FramePool(self._frame_shape())
+
+    def start_grabber(self, buffer_size: int = 4) -> bool:
+        """
+        Start a background thread that continuously grabs frames.
+
+        While the grabber runs, all reads (photos, recording, preview) are
+        served from its ring buffer instead of calling cap.read() directly.
+
+        Args:
+            buffer_size: Number of recent frames kept in the ring buffer
+
+        Returns:
+            True if the grabber is running, False otherwise
+        """
+        if not self.cap or not self.cap.isOpened():
+            print("Error: Camera is not open")
+            return False
+
+        if self.grabber and self.grabber.is_running:
+            return True
+
+        # The ring holds buffer_size frames; leave headroom for consumers
+        # that are still holding on to older ones
+        self.pool.max_free = max(self.pool.max_free, buffer_size + 4)
+        self.grabber = FrameGrabber(
+            self.cap, buffer_size, lock=self._cap_lock, pool=self.pool,
+            hub=self.hub, metrics=self.metrics
+        )
+        self.grabber.start()
+        self._read_seq = 0
+        return True
+
+    def stop_grabber(self):
+        """Stop the background grabber thread if it is running."""
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
 
-        # Apply image adjustments if set
-        if self.settings["brightness"] != -1:
-            self.cap.set(cv2.CAP_PROP_BRIGHTNESS, self.settings["brightness"])
-        if self.settings["contrast"] != -1:
-            self.cap.set(cv2.CAP_PROP_CONTRAST, self.settings["contrast"])
-        if self.settings["saturation"] != -1:
-            self.cap.set(cv2.CAP_PROP_SATURATION, self.settings["saturation"])
+    def subscribe(self, name: str, depth: int = 2, policy: str = DROP_OLDEST,
+                  block_timeout: Optional[float] = None) -> Optional[FrameQueue]:
+        """
+        Subscribe to every frame captured by the background grabber.
+
+        Starts the grabber if it is not running yet. Frames taken from the
+        returned queue must be released by the consumer.
+
+        Args:
+            name: Name used to identify the consumer
+            depth: Maximum number of frames waiting for this consumer
+            policy: What to do when the queue is full: DROP_OLDEST,
+                    DROP_NEWEST or BLOCK (which throttles the capture thread)
+            block_timeout: With BLOCK, how long to wait before dropping
+
+        Returns:
+            The subscriber queue, or None if the camera is not open
+        """
+        if not self.start_grabber():
+            return None
+        # Keep enough idle buffers around to refill this queue without
+        # allocating
+        self.pool.max_free += depth
+        return self.hub.subscribe(name, depth, policy, block_timeout)
+
+    def unsubscribe(self, queue: FrameQueue):
+        """Stop delivering frames to a subscriber queue."""
+        self.hub.unsubscribe(queue)
+        self.pool.max_free = max(8, self.pool.max_free - queue.maxsize)
+
+    def start_pre_event(self) -> bool:
+        """
+        Start keeping the last pre_event_seconds of video in memory.
+
+        The next recording then begins with the buffered frames. Starts the
+        background grabber if it is not running yet.
+
+        Returns:
+            True if the buffer is running, False otherwise
+        """
+        with self._pre_event_lock:
+            if self.pre_event is not None:
+                return True
+            seconds = self.settings["pre_event_seconds"]
+            if seconds <= 0:
+                print("Error: pre_event_seconds is not set")
+                return False
+
+            queue = self.subscribe("pre_event", 4, DROP_OLDEST)
+            if queue is None:
+                return False
+            max_bytes = int(self.settings["pre_event_megabytes"] * 1e6)
+            self.pre_event = PreEventBuffer(queue, seconds, max_bytes, detach=self.unsubscribe)
+            return True
+
+    def stop_pre_event(self):
+        """Stop the pre-event buffer and free its memory."""
+        with self._pre_event_lock:
+            if self.pre_event is not None:
+                self.pre_event.stop()
+                self.pre_event = None
+
+    def latest_frame(self) -> Optional[Frame]:
+        """
+        Get the most recently grabbed frame.
+
+        The caller must call release() on the frame when done with it.
+
+        Returns:
+            The newest frame, or None if the grabber is not running or has
+            not captured anything yet
+        """
+        if not self.grabber:
+            return None
+        return self.grabber.latest()
+
+    def next_frame(self, after_seq: int, timeout: Optional[float] = 1.0) -> Optional[Frame]:
+        """
+        Get the next grabbed frame after a given sequence number.
+
+        The caller must call release() on the frame when done with it.
+
+        Args:
+            after_seq: Sequence number of the last frame the caller has seen
+            timeout: Maximum time to wait for a new frame
+
+        Returns:
+            The next frame, or None on timeout or if the grabber is not running
+        """
+        if not self.grabber:
+            return None
+        return self.grabber.next_frame(after_seq, timeout)
+
+    def read_frame(self, timeout: Optional[float] = 1.0) -> Optional[Frame]:
+        """
+        Read the next frame for a single sequential consumer.
+
+        Uses the background grabber when it is running, otherwise reads
+        from the device directly into a pooled buffer. The caller must call
+        release() on the frame when done with it.
+
+        Args:
+            timeout: Maximum time to wait for a frame from the grabber
+
+        Returns:
+            The frame, or None if no frame could be read
+        """
+        if self.grabber:
+            frame = self.grabber.next_frame(self._read_seq, timeout)
+            if frame is not None:
+                self._read_seq = frame.seq
+            return frame
+
+        with self._cap_lock:
+            if TRACER.enabled:
+                t0 = time.monotonic_ns()
+            # Stamp the frame when it arrives, like the grabber: after the
+            # blocking grab() but before decoding it
+            image = None
+            if self.cap.grab():
+                timestamp = time.monotonic()
+                image = self.pool.read(self.cap.retrieve)
+        if image is None:
+            self.metrics.read_failed()
+            return None
+        self.metrics.frame_read(timestamp)
+        self._read_seq += 1
+        if TRACER.enabled:
+            TRACER.span(READ, self._read_seq, t0)
+        return self.pool.wrap(self._read_seq, timestamp, image)
 
     def capture_photo(self, filename: Optional[str] = None) -> Optional[str]:
         """
@@ -94,11 +2152,21 @@ class Camera:
             print("Error: Camera is not open")
             return None
 
-        ret, frame = self.cap.read()
-        if not ret:
+        frame = self.latest_frame() or self.read_frame()
+        if frame is None:
             print("Error: Failed to capture frame")
             return None
 
+        filepath = self._photo_path(filename)
+
+        # Save the photo
+        cv2.imwrite(str(filepath), frame.image)
+        frame.release()
+        print(f"Photo saved: {filepath}")
+        return str(filepath)
+
+    def _photo_path(self, filename: Optional[str]) -> Path:
+        """Build the output path for a photo, generating a name if needed."""
         # Generate filename if not provided
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -109,12 +2177,217 @@ class Camera:
         if not filename.endswith(f".{ext}"):
             filename = f"{filename}.{ext}"
 
-        filepath = self.output_dir / filename
+        return self.output_dir / filename
 
-        # Save the photo
-        cv2.imwrite(str(filepath), frame)
-        print(f"Photo saved: {filepath}")
-        return str(filepath)
+    def capture_photo_async(self, filename: Optional[str] = None,
+                            timestamp: Optional[float] = None) -> Optional[Future]:
+        """
+        Capture a photo and encode it in the background.
+
+        The frame is grabbed immediately; encoding and writing the file
+        happen on the photo encoder pool. While the grabber runs the photo
+        comes from its ring buffer, so there is no shutter lag and no extra
+        read competing with preview or recording.
+
+        Args:
+            filename: Optional filename for the photo. If not provided,
+                      a timestamp-based name will be generated.
+            timestamp: time.monotonic() of the shutter press; with the
+                       grabber running, the buffered frame captured closest
+                       to it is used instead of the newest one
+
+        Returns:
+            A future resolving to the saved path (or None if writing failed),
+            or None if the frame could not be captured
+        """
+        if not self.cap or not self.cap.isOpened():
+            print("Error: Camera is not open")
+            return None
+
+        frame = None
+        if self.grabber and timestamp is not None:
+            frame = self.grabber.frame_at(timestamp)
+        frame = frame or self.latest_frame() or self.read_frame()
+        if frame is None:
+            print("Error: Failed to capture frame")
+            return None
+
+        if self.photo_encoder is None:
+            self.photo_encoder = PhotoEncoder(metrics=self.metrics)
+        return self.photo_encoder.submit(frame, self._photo_path(filename))
+
+    def capture_burst(self, count: int, interval: float = 0.0,
+                      name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Capture a burst of photos at high speed, then encode them in parallel.
+
+        Frames are read into a single pre-sized buffer, each one scheduled
+        against a monotonic deadline (start + i * interval) so read time
+        does not accumulate into the interval. Encoding only starts once the
+        whole burst is in memory. Series with an interval of a second or
+        more, or too large to buffer, are encoded as they are captured
+        instead (see _capture_series()).
+
+        Args:
+            count: Number of photos to capture
+            interval: Seconds between photos (0 for the camera's native rate)
+            name: Optional base filename; photos are numbered name_1, name_2...
+
+        Returns:
+            Dictionary with the saved paths, achieved FPS and timestamp
+            jitter, or None if the camera is not open
+        """
+        if not self.cap or not self.cap.isOpened():
+            print("Error: Camera is not open")
+            return None
+
+        height, width, channels = self._frame_shape()
+        base = name or f"burst_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if interval >= BURST_MAX_INTERVAL or count * height * width * channels > BURST_MAX_BYTES:
+            return self._capture_series(count, interval, base)
+
+        burst = np.empty((count, height, width, channels), dtype=np.uint8)
+        images: List[Optional[np.ndarray]] = [None] * count
+        timestamps: List[float] = []
+        last_seq = self.grabber.seq if self.grabber else 0
+
+        print(f"Capturing burst of {count} photos...")
+        start = time.monotonic()
+        for i in range(count):
+            delay = start + i * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            if self.grabber:
+                frame = self.grabber.next_frame(last_seq)
+                if frame is None:
+                    print("Warning: Failed to capture frame")
+                    continue
+                last_seq = frame.seq
+                timestamp = frame.timestamp
+                if frame.image.shape == burst[i].shape:
+                    np.copyto(burst[i], frame.image)
+                    image = burst[i]
+                else:
+                    image = frame.image.copy()
+                frame.release()
+            else:
+                with self._cap_lock:
+                    ret, image = self.cap.read(burst[i])
+                    timestamp = time.monotonic()
+                if not ret:
+                    self.metrics.read_failed()
+                    print("Warning: Failed to capture frame")
+                    continue
+                self.metrics.frame_read(timestamp)
+
+            images[i] = image
+            timestamps.append(timestamp)
+
+        # Encode everything in parallel now that the sensor is free
+        encoder = PhotoEncoder(workers=os.cpu_count() or 2, max_pending=count,
+                               metrics=self.metrics)
+        futures = [
+            encoder.submit(Frame(i + 1, 0.0, image), self._photo_path(f"{base}_{i + 1}"))
+            for i, image in enumerate(images) if image is not None
+        ]
+        encoder.close()
+        paths = [future.result() for future in futures]
+
+        stats = self._burst_stats(timestamps, interval)
+        stats["paths"] = paths
+        stats["encode_ms_avg"] = encoder.stats()["encode_ms_avg"]
+        print(f"Burst saved {sum(1 for p in paths if p)}/{count} photos: "
+              f"{stats['fps']:.1f} FPS, jitter {stats['jitter_ms_mean']:.2f} ms mean / "
+              f"{stats['jitter_ms_max']:.2f} ms max")
+        return stats
+
+    def _capture_series(self, count: int, interval: float, base: str) -> Dict[str, Any]:
+        """
+        Capture a series of photos, encoding each one as soon as it is taken.
+
+        Used by capture_burst() for slow or long series such as timelapses:
+        memory stays constant however many photos are taken, and photos
+        already taken are kept if the series is interrupted.
+
+        Args:
+            count: Number of photos to capture
+            interval: Seconds between photos
+            base: Base filename; photos are numbered base_1, base_2...
+
+        Returns:
+            Dictionary with the saved paths, achieved FPS and timestamp jitter
+        """
+        workers = min(os.cpu_count() or 2, 4)
+        encoder = PhotoEncoder(workers=workers, max_pending=workers * 2, metrics=self.metrics)
+        futures: List[Future] = []
+        timestamps: List[float] = []
+
+        print(f"Capturing {count} photos every {interval}s...")
+        start = time.monotonic()
+        try:
+            for i in range(count):
+                delay = start + i * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+                # A fresh frame, not one that sat in the ring since the last photo
+                if self.grabber:
+                    frame = self.grabber.next_frame(self.grabber.seq)
+                else:
+                    frame = self.read_frame()
+                if frame is None:
+                    print("Warning: Failed to capture frame")
+                    continue
+                timestamps.append(frame.timestamp)
+                futures.append(encoder.submit(frame, self._photo_path(f"{base}_{i + 1}")))
+        except KeyboardInterrupt:
+            print("\nCapture interrupted")
+        finally:
+            encoder.close()
+        paths = [future.result() for future in futures]
+
+        stats = self._burst_stats(timestamps, interval)
+        stats["paths"] = paths
+        stats["encode_ms_avg"] = encoder.stats()["encode_ms_avg"]
+        print(f"Saved {sum(1 for p in paths if p)}/{count} photos: "
+              f"jitter {stats['jitter_ms_mean']:.2f} ms mean / "
+              f"{stats['jitter_ms_max']:.2f} ms max")
+        return stats
+
+    @staticmethod
+    def _burst_stats(timestamps: List[float], interval: float) -> Dict[str, Any]:
+        """Compute achieved FPS and per-frame timestamp jitter for a burst."""
+        if len(timestamps) < 2:
+            return {"captured": len(timestamps), "fps": 0.0,
+                    "jitter_ms_mean": 0.0, "jitter_ms_max": 0.0}
+
+        deltas = np.diff(np.asarray(timestamps))
+        # Jitter is measured against the requested interval, or against the
+        # mean frame interval when capturing at the native rate
+        target = interval if interval > 0 else float(deltas.mean())
+        jitter = np.abs(deltas - target) * 1000
+        elapsed = timestamps[-1] - timestamps[0]
+        return {
+            "captured": len(timestamps),
+            "fps": (len(timestamps) - 1) / elapsed if elapsed > 0 else 0.0,
+            "jitter_ms_mean": float(jitter.mean()),
+            "jitter_ms_max": float(jitter.max()),
+        }
+
+    def flush_photos(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for photos queued by capture_photo_async() to be written.
+
+        Args:
+            timeout: Maximum time to wait (None waits forever)
+
+        Returns:
+            True if no photos are pending any more
+        """
+        if self.photo_encoder is None:
+            return True
+        return self.photo_encoder.flush(timeout)
 
     def start_recording(self, filename: Optional[str] = None) -> bool:
         """
@@ -147,8 +2420,9 @@ class Camera:
         filepath = self.output_dir / filename
 
         # Get actual resolution from camera
-        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        with self._cap_lock:
+            width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         fps = self.settings["fps"]
         
         # Ensure resolution is valid
@@ -157,58 +2431,309 @@ class Camera:
         if fps <= 0:
             fps = 30
 
-        # Create video writer - try H264 first (best quality/size)
-        fourcc = cv2.VideoWriter_fourcc(*'avc1')
-        self.video_writer = cv2.VideoWriter(
-            str(filepath), fourcc, fps, (width, height)
-        )
+        segment_seconds = self.settings["segment_seconds"]
+        segment_megabytes = self.settings["segment_megabytes"]
+        segmented = segment_seconds > 0 or segment_megabytes > 0
+        frame_times = array('d')
 
-        if not self.video_writer.isOpened():
-            print("Error: Failed to create video writer with avc1")
-            # Try mp4v as fallback
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            self.video_writer = cv2.VideoWriter(
-                str(filepath), fourcc, fps, (width, height)
-            )
-            if not self.video_writer.isOpened():
-                print("Error: Failed to create video writer with mp4v")
-                # Try MJPG as last resort
-                fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-                filepath = filepath.with_suffix('.avi')
-                self.video_writer = cv2.VideoWriter(
-                    str(filepath), fourcc, fps, (width, height)
+        # Open the best codec known to work (H.264 first, MJPG as last
+        # resort); probe only the first time this combination is used
+        self.video_writer = None
+        container = filepath.suffix
+        for refresh in (False, True):
+            choice = self.codec_cache.best(container, (width, height), fps, refresh)
+            if choice is None:
+                break
+            fourcc, ext = choice
+            filepath = filepath.with_suffix(ext)
+
+            def open_writer(path: Path, fourcc: str = fourcc) -> cv2.VideoWriter:
+                return cv2.VideoWriter(
+                    str(path), cv2.VideoWriter_fourcc(*fourcc), fps, (width, height)
+                )
+
+            if segmented:
+                self.video_writer = SegmentedWriter(
+                    filepath, open_writer, fps, segment_seconds, segment_megabytes,
+                    frame_times=frame_times, metrics=self.metrics
                 )
-                if not self.video_writer.isOpened():
-                    print("Error: Failed to create video writer with MJPG too")
-                    return False
-                print(f"Recording started with MJPG codec: {filepath}")
             else:
-                print(f"Recording started with mp4v codec: {filepath}")
+                self.video_writer = open_writer(filepath)
+            if self.video_writer.isOpened():
+                break
+            # The cached result is stale; probe again once
+            self.video_writer.release()
+            self.video_writer = None
+
+        if self.video_writer is None:
+            print("Error: Failed to create video writer with any codec")
+            return False
+        print(f"Recording started with {CODEC_NAMES.get(fourcc, fourcc)} codec: {filepath}")
+        if segmented:
+            limits = []
+            if segment_seconds > 0:
+                limits.append(f"{segment_seconds}s")
+            if segment_megabytes > 0:
+                limits.append(f"{segment_megabytes} MB")
+            print(f"Splitting into segments of {' or '.join(limits)}: "
+                  f"{self.video_writer.manifest_path}")
         else:
-            print(f"Recording started with avc1 (H.264) codec: {filepath}")
+            self.metrics.track_file(filepath)
 
+        # With segments this is the base name the sidecar files share
         self.recording_filename = filepath
-        self.is_recording = True
+        self._pacer = FramePacer(self.video_writer, fps, self.settings["frame_rate_mode"],
+                                 metrics=self.metrics)
+        self._pacer.frame_times = frame_times
+
+        if self.settings["audio_enabled"]:
+            silence_db = None
+            if self.settings["audio_silence_pause"]:
+                silence_db = self.settings["audio_silence_db"]
+            self.audio_recorder = AudioRecorder(
+                self.settings["audio_device"], self.settings["audio_rate"],
+                self.settings["audio_channels"], silence_db=silence_db,
+                silence_seconds=self.settings["audio_silence_seconds"]
+            )
+            if self.audio_recorder.start(filepath.with_suffix(".wav")):
+                print(f"Recording audio: {self.audio_recorder.path}")
+            else:
+                self.audio_recorder = None
+
+        # The recording starts with the buffered frames
+        with self._pre_event_lock:
+            pre_event = self.pre_event
+            self.pre_event = None
+            self._pre_event_lead = 0.0
+            if pre_event is not None:
+                oldest = pre_event.begin_replay()
+                if oldest is not None:
+                    self._pre_event_lead = time.monotonic() - oldest
+                    print(f"Including {self._pre_event_lead:.1f}s of pre-event video")
+            self.is_recording = True
+
+        # With the grabber running, the recorder is just another hub
+        # subscriber drained by its own writer thread; otherwise a writer
+        # thread is only used when enabled in the settings
+        queue_size = self.settings["writer_queue_size"]
+        policy = self.settings["writer_full_policy"]
+        if pre_event is not None:
+            # The writer thread replays the buffer first and attaches the
+            # live queue to the hub once it has caught up
+            queue = FrameQueue("recorder", queue_size, policy, block_timeout=1.0)
+            self.pool.max_free += queue_size
+            self._recorder_queue = queue
+            sink = self._pacer.write
+            grabber = self.grabber
+            self.writer_thread = VideoWriterThread(
+                sink, queue,
+                prologue=lambda: pre_event.replay(sink, queue, self.hub.attach,
+                                                  lambda: grabber.seq)
+            )
+        elif self.grabber and self.grabber.is_running:
+            # A blocked writer must not stall the capture thread for good
+            self._recorder_queue = self.subscribe(
+                "recorder", queue_size, policy, block_timeout=1.0
+            )
+            self.writer_thread = VideoWriterThread(self._pacer.write, self._recorder_queue)
+        elif self.settings["writer_threaded"]:
+            self.writer_thread = VideoWriterThread(
+                self._pacer.write, FrameQueue("recorder", queue_size, policy)
+            )
         return True
 
-    def stop_recording(self) -> Optional[str]:
+    def write_frame(self, frame: Frame):
+        """
+        Write a frame to the active recording.
+
+        Frames are paced onto the output timeline according to the
+        frame_rate_mode setting (see FramePacer). With a writer thread the
+        frame is only queued here.
+
+        Args:
+            frame: The frame to write; the caller keeps its reference
+        """
+        if self.writer_thread is not None:
+            self.writer_thread.put(frame)
+        elif self._pacer is not None:
+            self._pacer.write(frame)
+
+    def get_writer_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics of the background video writer.
+
+        Returns:
+            Dictionary with queue depth, capacity, policy and frames written
+            and dropped by the current (or last) writer thread; empty if no
+            writer thread was used
+        """
+        if self.writer_thread is not None:
+            return self.writer_thread.stats()
+        return self._writer_stats.copy()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get live pipeline metrics.
+
+        Cheap enough to poll several times per second; nothing here locks
+        the capture loop.
+
+        Returns:
+            Dictionary with rolling capture and write FPS, frames read,
+            written and dropped by the writer, read failures, writer queue
+            depth and size, encode latency p50/p99 in milliseconds and bytes
+            written (including the recording in progress)
+        """
+        with self._writer_lock:
+            snapshot = self.metrics.snapshot()
+            writer_thread = self.writer_thread
+            if writer_thread is not None:
+                snapshot["dropped"] += writer_thread.queue.dropped
+        snapshot["recording"] = self.is_recording
+        snapshot["queue_depth"] = 0
+        snapshot["queue_size"] = 0
+        if writer_thread is not None:
+            snapshot["queue_depth"] = writer_thread.queue.qsize()
+            snapshot["queue_size"] = writer_thread.queue.maxsize
+
+        audio_recorder = self.audio_recorder
+        if audio_recorder is not None:
+            snapshot["audio_overruns"] = (audio_recorder.ring.overruns
+                                          + audio_recorder.input_overflows)
+        return snapshot
+
+    def stop_recording(self, duration: Optional[float] = None,
+                       drain_timeout: float = 5.0) -> Optional[str]:
         """
         Stop recording a video.
 
+        Args:
+            duration: Length the recording should have in seconds; defaults
+                      to the time from the first frame to this call
+            drain_timeout: Maximum time to wait for the writer thread to
+                           write frames that are still queued (and again for
+                           the frame it is writing before leaving it to
+                           finish the recording in the background)
+
         Returns:
-            The path to the saved video, or None if not recording
+            The path to the saved video (the segment manifest when the
+            recording was split), or None if not recording
         """
         if not self.is_recording:
             print("Error: Not recording")
             return None
 
+        # Draining the writer below takes time that must not end up padded
+        # into the recording
+        stop_time = time.monotonic()
         self.is_recording = False
-        self.video_writer.release()
-        self.video_writer = None
 
+        audio_recorder = self.audio_recorder
+        audio_stats = None
+        if audio_recorder is not None:
+            audio_stats = audio_recorder.stop()
+            self.audio_recorder = None
+
+        # Let the writer thread drain what was already queued
+        if self._recorder_queue is not None:
+            self.unsubscribe(self._recorder_queue)
+            self._recorder_queue = None
+        writer_thread = self.writer_thread
+        if writer_thread is not None:
+            pending = writer_thread.stop(drain_timeout)
+            self._writer_stats = writer_thread.stats()
+            self._writer_stats["pending_discarded"] = pending
+            # Detach first so get_metrics() stops adding the queue's drops
+            # in the same step that they move into the counter
+            with self._writer_lock:
+                self.writer_thread = None
+                self.metrics.frames_lost(self._writer_stats["dropped"] + pending)
+            if pending:
+                print(f"Warning: {pending} queued frames were not written "
+                      f"within {drain_timeout}s")
+            if self._writer_stats["errors"]:
+                print(f"Warning: {self._writer_stats['errors']} frames failed to write "
+                      f"(last: {self._writer_stats['last_error']})")
+
+        pacer, video_writer = self._pacer, self.video_writer
         filepath = self.recording_filename
-        print(f"Recording saved: {filepath}")
-        return str(filepath)
+        self._pacer = None
+        self.video_writer = None
+        result = str(filepath)
+        if isinstance(video_writer, SegmentedWriter):
+            result = str(video_writer.manifest_path)
+
+        def finish():
+            # The pacer only knows its start once the first frame was written
+            length = duration
+            if length is None and pacer.start is not None:
+                length = max(0.0, stop_time - pacer.start)
+            self._finish_recording(pacer, video_writer, filepath, length,
+                                   audio_recorder, audio_stats)
+
+        if writer_thread is not None and writer_thread.abandoned:
+            # Releasing the writer under the stuck thread would corrupt the
+            # file; the thread finishes the recording whenever it returns
+            print(f"Warning: Video writer is still busy after {2 * drain_timeout}s; "
+                  f"the recording will be finished in the background")
+            writer_thread.when_done(finish)
+        else:
+            finish()
+
+        # Start buffering for the next recording
+        if self.settings["pre_event_seconds"] > 0 and self.cap and self.cap.isOpened():
+            self.start_pre_event()
+        return result
+
+    def _finish_recording(self, pacer: FramePacer, video_writer, filepath: Path,
+                          duration: Optional[float], audio_recorder: Optional[AudioRecorder],
+                          audio_stats: Optional[Dict[str, Any]]):
+        """Pad and close the video, write the sidecar files and report."""
+        self.recording_stats = pacer.finish(duration)
+        self.recording_stats["pre_event_seconds"] = self._pre_event_lead
+        video_writer.release()
+        segmented = isinstance(video_writer, SegmentedWriter)
+        if segmented:
+            self.recording_stats["segments"] = len(video_writer.segments)
+            self.recording_stats["manifest_file"] = str(video_writer.manifest_path)
+
+        self.metrics.finish_file()
+        if pacer.mode == VFR:
+            timestamps_path = filepath.with_suffix(".timestamps.txt")
+            pacer.save_timestamps(timestamps_path)
+            self.recording_stats["timestamps_file"] = str(timestamps_path)
+        self.recording_stats.update(
+            pacer.save_index(filepath.with_suffix(".index.npz"), audio_recorder)
+        )
+
+        stats = self.recording_stats
+        if segmented:
+            print(f"Recording saved: {stats['segments']} segments, "
+                  f"manifest {stats['manifest_file']}")
+        else:
+            print(f"Recording saved: {filepath}")
+        print(f"Frames: {stats['captured']} captured, {stats['written']} written, "
+              f"{stats['duplicated']} duplicated, {stats['dropped']} dropped "
+              f"({stats['achieved_fps']:.1f} FPS captured)")
+        if audio_stats is not None:
+            stats["audio"] = audio_stats
+            print(f"Audio saved: {audio_stats['file']} ({audio_stats['seconds']:.1f}s, "
+                  f"{audio_stats['overruns']} overruns, "
+                  f"{audio_stats['input_overflows']} input overflows)")
+        if "audio_drift_ppm" in stats:
+            print(f"Index saved: {stats['index_file']} (audio drift "
+                  f"{stats['audio_drift_ppm']:+.1f} ppm, audio/video length difference "
+                  f"{stats['audio_video_offset']:+.3f}s)")
+
+    def get_recording_stats(self) -> Dict[str, Any]:
+        """
+        Get frame statistics of the last finished recording.
+
+        Returns:
+            Dictionary with frames captured, written, duplicated, dropped
+            and the achieved capture FPS (empty if nothing was recorded yet)
+        """
+        return self.recording_stats.copy()
 
     def record_video(self, duration: float, filename: Optional[str] = None) -> Optional[str]:
         """
@@ -224,38 +2749,59 @@ class Camera:
         if not self.start_recording(filename):
             return None
 
-        import time
-        start_time = time.time()
-        fps = self.settings["fps"]
-        frame_delay = 1.0 / fps
+        # Frames are read as fast as the camera delivers them; the pacer
+        # maps them onto the output timeline, so no sleeping is needed here
+        start_time = time.monotonic()
+        end_time = start_time + duration
+        interrupted = False
+        next_status = start_time
+        status_width = 0
+        last_frame_time = start_time
+        # Pre-event video comes on top of the requested duration
+        length = self._pre_event_lead + duration
+        self._pacer.limit = length
 
         print(f"Recording for {duration} seconds... Press Ctrl+C to stop early")
 
         try:
-            while time.time() - start_time < duration:
-                frame_start = time.time()
-
-                ret, frame = self.cap.read()
-                if not ret:
-                    print("Warning: Failed to capture frame")
-                    continue
-
-                self.video_writer.write(frame)
-
-                # Maintain frame rate
-                elapsed = time.time() - frame_start
-                if elapsed < frame_delay:
-                    time.sleep(frame_delay - elapsed)
-
-                # Show progress
-                elapsed_time = time.time() - start_time
-                print(f"\rRecording: {elapsed_time:.1f}s / {duration}s", end="", flush=True)
+            while time.monotonic() < end_time:
+                if self._recorder_queue is not None:
+                    # Frames arrive through the hub; nothing to read here
+                    time.sleep(0.1)
+                else:
+                    frame = self.read_frame()
+                    if frame is None:
+                        print("Warning: Failed to capture frame")
+                        # A device that went away (e.g. unplugged USB camera)
+                        # keeps failing; reopen it instead of spinning
+                        if time.monotonic() - last_frame_time > RECONNECT_AFTER:
+                            self.reconnect()
+                            last_frame_time = time.monotonic()
+                        continue
+                    last_frame_time = frame.timestamp
+                    if frame.timestamp >= end_time:
+                        frame.release()
+                        break
+
+                    self.write_frame(frame)
+                    frame.release()
+
+                # Show progress and pipeline health a few times per second
+                now = time.monotonic()
+                if now >= next_status:
+                    next_status = now + 0.25
+                    status = (f"Recording: {now - start_time:.1f}s / {duration}s | "
+                              f"{format_metrics(self.get_metrics())}")
+                    # Pad so a shorter line fully overwrites the previous one
+                    print(f"\r{status:<{status_width}}", end="", flush=True)
+                    status_width = len(status)
 
         except KeyboardInterrupt:
             print("\nRecording interrupted")
+            interrupted = True
 
         print()  # New line after progress
-        return self.stop_recording()
+        return self.stop_recording(None if interrupted else length)
 
     def preview(self, duration: float = 5):
         """
@@ -270,18 +2816,18 @@ class Camera:
 
         print(f"Preview window opened. Press 'q' to quit or wait {duration}s")
 
-        import time
         start_time = time.time()
 
         cv2.namedWindow("Camera Preview", cv2.WINDOW_NORMAL)
 
         while True:
-            ret, frame = self.cap.read()
-            if not ret:
+            frame = self.read_frame()
+            if frame is None:
                 print("Warning: Failed to capture frame")
                 continue
 
-            cv2.imshow("Camera Preview", frame)
+            cv2.imshow("Camera Preview", frame.image)
+            frame.release()
 
             # Check for quit key
             if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -307,6 +2853,12 @@ class Camera:
         Returns:
             Updated settings
         """
+        with self._pre_event_lock:
+            if self.is_recording and any(key in PRE_EVENT_SETTINGS for key in kwargs):
+                print("Warning: Pre-event settings cannot change while recording")
+                kwargs = {key: value for key, value in kwargs.items()
+                          if key not in PRE_EVENT_SETTINGS}
+
         valid_keys = self.settings.keys()
         for key, value in kwargs.items():
             if key in valid_keys:
@@ -314,10 +2866,19 @@ class Camera:
             else:
                 print(f"Warning: Unknown setting '{key}'")
 
-        # Re-apply settings if camera is open
-        if self.cap and self.cap.isOpened():
+        # Re-apply settings if camera is open; renegotiating the device can
+        # be slow, so only when a device setting changed
+        if self.cap and self.cap.isOpened() and any(key in DEVICE_SETTINGS for key in kwargs):
             self._apply_settings()
 
+        # Restart the pre-event buffer with the new size
+        with self._pre_event_lock:
+            if (self.cap and self.cap.isOpened() and not self.is_recording
+                    and any(key in PRE_EVENT_SETTINGS for key in kwargs)):
+                self.stop_pre_event()
+                if self.settings["pre_event_seconds"] > 0:
+                    self.start_pre_event()
+
         return self.settings.copy()
 
     def save_settings(self, filepath: str = "camera_settings.json"):
@@ -355,21 +2916,66 @@ class Camera:
         print(f"Settings loaded from {filepath}")
         return True
 
-    def list_cameras(self) -> list:
+    def list_cameras(self, max_index: int = 10, timeout: float = 3.0,
+                     refresh: bool = False) -> List[Dict[str, Any]]:
         """
         List available camera devices.
 
+        On Linux, V4L2 nodes that cannot capture (metadata nodes, codecs)
+        are skipped without opening them. The remaining candidates are
+        probed concurrently, each with a time limit, and the inventory is
+        cached for CAMERA_CACHE_TTL seconds.
+
+        Args:
+            max_index: Number of camera IDs to probe when V4L2 is unavailable
+            timeout: Maximum time to wait for slow devices to open
+            refresh: Ignore the cached inventory
+
         Returns:
-            List of available camera IDs
+            List of dictionaries with the camera "index", device "path"
+            (None if unknown), "name" and the "backends" that opened it
         """
+        now = time.monotonic()
+        cached = _camera_cache["devices"]
+        if cached is not None and not refresh and now - _camera_cache["time"] < CAMERA_CACHE_TTL:
+            return [dict(device) for device in cached]
+
+        candidates = _v4l2_devices()
+        if candidates is None:
+            candidates = [
+                {"index": i, "path": None, "name": f"Camera {i}"} for i in range(max_index)
+            ]
+
+        # Probe every candidate/backend pair on its own daemon thread so a
+        # hanging device cannot hold up the others (or interpreter exit)
+        results: Dict[Tuple[int, int], str] = {}
+        threads = []
+        for device in candidates:
+            for backend in _camera_backends():
+                thread = threading.Thread(
+                    target=_probe_camera, args=(device["index"], backend, results),
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+        # Probes that timed out may still add results; work on a snapshot
+        found = dict(results)
         available = []
-        # Check first 10 camera IDs
-        for i in range(10):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                available.append(i)
-                cap.release()
-        return available
+        for device in candidates:
+            backends = [
+                name for (index, _), name in sorted(found.items()) if index == device["index"]
+            ]
+            if backends:
+                available.append(dict(device, backends=backends))
+
+        _camera_cache["time"] = time.monotonic()
+        _camera_cache["devices"] = available
+        return [dict(device) for device in available]
 
     def __enter__(self):
         """Context manager entry."""
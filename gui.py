@@ -9,14 +9,28 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import cv2
 from PIL import Image, ImageTk
-import threading
+import time
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from camera import Camera
-import pyaudio
-import wave
+from metrics import format_metrics
+from tracing import TRACER, PROCESS, DISPLAY
+
+# Preview refresh period, about one display refresh at 60 Hz
+PREVIEW_INTERVAL_MS = 16
+
+# Frames of history kept for zero-shutter-lag photos
+PHOTO_HISTORY_FRAMES = 8
+
+# Level meter refresh period and the dBFS range it shows
+METER_INTERVAL_MS = 100
+METER_FLOOR_DB = -60.0
+
+# Largest factor the preview rate is divided by while the writer lags
+MAX_PREVIEW_DECIMATION = 8
 
 
 class CameraGUI:
@@ -37,12 +51,25 @@ class CameraGUI:
         self.root.geometry(f"{width}x{height}+{x}+{y}")
         self.root.minsize(1200, 800)
 
-        # Camera instance
+        # Camera instance; opening and closing happen on a worker thread
+        # because V4L2 devices can take seconds to open or renegotiate
         self.camera = None
+        self.camera_worker = ThreadPoolExecutor(1, thread_name_prefix="CameraWorker")
+        self.connect_generation = 0
+        self.connecting_id = None
+        self.connect_started = None
+        self.switch_job = None
         self.is_preview_running = False
         self.is_recording = False
-        self.preview_thread = None
-        self.stop_preview = threading.Event()
+        self.recording_busy = False
+        self.preview_queue = None
+        self.preview_job = None
+        self.preview_size = (0, 0)
+        self.preview_photo = None
+        self.preview_decimation = 1
+        self.preview_healthy_since = None
+        self.metrics_job = None
+        self.meter_job = None
 
         # Output directory
         self.output_dir = Path("./captures")
@@ -51,6 +78,8 @@ class CameraGUI:
         # Settings
         self.resolution_var = tk.StringVar(value="1280x720")
         self.fps_var = tk.StringVar(value="30")
+        self.preview_fps_var = tk.StringVar(value="30")
+        self.pre_event_var = tk.StringVar(value="0")
         self.photo_format_var = tk.StringVar(value="png")
         self.video_format_var = tk.StringVar(value="avi")
         self.camera_id_var = tk.IntVar(value=0)
@@ -58,16 +87,13 @@ class CameraGUI:
         # Audio settings
         self.mic_enabled_var = tk.BooleanVar(value=False)
         self.mic_device_var = tk.StringVar(value="Default")
+        self.mic_silence_var = tk.BooleanVar(value=False)
+        self.mic_level_var = tk.StringVar(value="")
         self.available_mics = []
         self._refresh_mic_devices()
 
         # Recording state
         self.recording_start_time = None
-        self.audio_recording = None
-        self.audio_frames = []
-        self.is_recording_audio = False
-        self.audio_stream = None
-        self.audio_thread = None
         self.current_video_file = None
 
         # Setup UI
@@ -94,6 +120,11 @@ class CameraGUI:
         except Exception as e:
             self.available_mics = ["Default", "No audio devices found"]
 
+    def _selected_mic(self):
+        """PyAudio device index of the selected microphone (None for default)."""
+        device = self.mic_device_var.get().split(":", 1)[0]
+        return int(device) if device.isdigit() else None
+
     def _setup_ui(self):
         """Setup the user interface."""
         # Main container using PanedWindow for better layout control
@@ -107,9 +138,13 @@ class CameraGUI:
         # Video label with fixed aspect ratio container
         self.video_frame = ttk.Frame(left_panel, relief=tk.SUNKEN, borderwidth=2)
         self.video_frame.pack(fill=tk.BOTH, expand=True)
+        # The preview image must never resize the layout it is fitted to
+        self.video_frame.pack_propagate(False)
         
-        self.video_label = ttk.Label(self.video_frame, background="black")
+        # The label centers the image on black, which letterboxes it
+        self.video_label = ttk.Label(self.video_frame, background="black", anchor=tk.CENTER)
         self.video_label.pack(fill=tk.BOTH, expand=True)
+        self.video_label.bind("<Configure>", self._on_preview_resize)
 
         # Status bar
         self.status_var = tk.StringVar(value="Ready - Click 'Start Camera' to begin")
@@ -119,6 +154,14 @@ class CameraGUI:
         )
         status_bar.pack(fill=tk.X, pady=(5, 0))
 
+        # Live pipeline metrics, refreshed while the camera runs
+        self.metrics_var = tk.StringVar(value="")
+        metrics_bar = ttk.Label(
+            left_panel, textvariable=self.metrics_var,
+            relief=tk.SUNKEN, anchor=tk.W
+        )
+        metrics_bar.pack(fill=tk.X, pady=(2, 0))
+
         # Right panel - Controls (fixed width)
         right_panel = ttk.Frame(self.main_pane, width=380)
         self.main_pane.add(right_panel, weight=1)
@@ -128,11 +171,13 @@ class CameraGUI:
         camera_frame.pack(fill=tk.X, pady=(0, 10))
 
         ttk.Label(camera_frame, text="Camera ID:").pack(anchor=tk.W)
-        camera_spinbox = ttk.Spinbox(
+        self.camera_spinbox = ttk.Spinbox(
             camera_frame, from_=0, to=10, width=10,
             textvariable=self.camera_id_var
         )
-        camera_spinbox.pack(anchor=tk.W, pady=(5, 0))
+        self.camera_spinbox.pack(anchor=tk.W, pady=(5, 0))
+        # Changing the ID while the camera runs switches to the new device
+        self.camera_id_var.trace_add("write", self._on_camera_id_change)
 
         self.start_camera_btn = ttk.Button(
             camera_frame, text="📹 Start Camera", command=self._start_camera
@@ -163,6 +208,20 @@ class CameraGUI:
         )
         self.mic_toggle_btn.pack(fill=tk.X, pady=(15, 0))
 
+        ttk.Checkbutton(
+            mic_frame, text="Pause audio during silence",
+            variable=self.mic_silence_var
+        ).pack(fill=tk.X, pady=(5, 0))
+
+        # Level meter, live while recording with the microphone enabled
+        self.mic_meter = ttk.Progressbar(
+            mic_frame, maximum=-METER_FLOOR_DB, mode="determinate"
+        )
+        self.mic_meter.pack(fill=tk.X, pady=(10, 0))
+        ttk.Label(
+            mic_frame, textvariable=self.mic_level_var, foreground="gray"
+        ).pack(anchor=tk.W, pady=(2, 0))
+
         # Photo controls
         photo_frame = ttk.LabelFrame(right_panel, text="Photo", padding=15)
         photo_frame.pack(fill=tk.X, pady=(0, 10))
@@ -190,6 +249,22 @@ class CameraGUI:
             textvariable=self.fps_var
         )
         fps_spinbox.pack(anchor=tk.W, pady=(5, 0))
+
+        ttk.Label(video_frame, text="Preview FPS:").pack(anchor=tk.W, pady=(10, 0))
+        preview_fps_spinbox = ttk.Spinbox(
+            video_frame, from_=1, to=60, width=10,
+            textvariable=self.preview_fps_var
+        )
+        preview_fps_spinbox.pack(anchor=tk.W, pady=(5, 0))
+
+        ttk.Label(video_frame, text="Pre-event seconds:").pack(anchor=tk.W, pady=(10, 0))
+        self.pre_event_spinbox = ttk.Spinbox(
+            video_frame, from_=0, to=60, width=10,
+            textvariable=self.pre_event_var, command=self._on_pre_event_change
+        )
+        self.pre_event_spinbox.pack(anchor=tk.W, pady=(5, 0))
+        self.pre_event_spinbox.bind("<Return>", lambda e: self._on_pre_event_change())
+        self.pre_event_spinbox.bind("<FocusOut>", lambda e: self._on_pre_event_change())
         
         ttk.Label(video_frame, text="Format: MP4 (H.264)", foreground="gray").pack(anchor=tk.W, pady=(10, 0))
 
@@ -253,149 +328,442 @@ class CameraGUI:
         style.configure("Recording.TButton", foreground="red")
 
     def _start_camera(self):
-        """Start the camera preview."""
-        camera_id = self.camera_id_var.get()
-        self.camera = Camera(camera_id)
-
-        if not self.camera.open():
-            messagebox.showerror("Error", "Could not open camera")
+        """Start opening the camera in the background."""
+        try:
+            camera_id = self.camera_id_var.get()
+            width, height = map(int, self.resolution_var.get().split('x'))
+            settings = {
+                "resolution": (width, height),
+                "fps": int(self.fps_var.get()),
+                "photo_format": self.photo_format_var.get(),
+                "video_format": self.video_format_var.get(),
+            }
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Error", f"Invalid camera settings: {e}")
             return
 
-        # Apply settings
-        width, height = map(int, self.resolution_var.get().split('x'))
-        self.camera.update_settings(
-            resolution=(width, height),
-            fps=int(self.fps_var.get()),
-            photo_format=self.photo_format_var.get(),
-            video_format=self.video_format_var.get()
+        # A newer generation cancels any connection still in progress
+        self.connect_generation += 1
+        generation = self.connect_generation
+        self.connecting_id = camera_id
+        self.connect_started = time.monotonic()
+
+        self.start_camera_btn.config(state=tk.DISABLED)
+        self.stop_camera_btn.config(state=tk.NORMAL, text="✖ Cancel")
+        self.status_var.set(f"Connecting to camera {camera_id}…")
+
+        future = self.camera_worker.submit(
+            self._open_camera, camera_id, settings, self._pre_event_seconds()
         )
+        self._poll_connect(future, generation)
+
+    @staticmethod
+    def _open_camera(camera_id, settings, pre_event_seconds=0):
+        """Open and configure a camera; runs on the camera worker thread."""
+        camera = Camera(camera_id)
+        try:
+            if not camera.open():
+                camera.close()
+                return None
+            camera.update_settings(**settings)
+
+            # Grab frames on a dedicated thread so preview, recording and
+            # photos never race each other on the capture device. The grabber
+            # keeps a few frames of history so photos can use the frame shown
+            # when the button was hit
+            camera.start_grabber(buffer_size=PHOTO_HISTORY_FRAMES)
+            if pre_event_seconds > 0:
+                camera.update_settings(pre_event_seconds=pre_event_seconds)
+        except Exception:
+            camera.close()
+            raise
+        return camera
+
+    def _pre_event_seconds(self) -> float:
+        """Pre-event buffer length from the spinbox (0 if invalid)."""
+        try:
+            return max(0.0, float(self.pre_event_var.get()))
+        except ValueError:
+            return 0.0
+
+    def _on_pre_event_change(self):
+        """Resize the pre-event buffer of the connected camera."""
+        camera = self.camera
+        if not camera or self.is_recording or self.recording_busy:
+            # The buffer is fixed while a recording uses it
+            return
+        seconds = self._pre_event_seconds()
+        if seconds != camera.settings["pre_event_seconds"]:
+            # Restarting the buffer joins its threads; run it on the camera
+            # worker, in order with start/stop recording
+            self.camera_worker.submit(camera.update_settings, pre_event_seconds=seconds)
+
+    def _poll_connect(self, future, generation):
+        """Attach the camera once the worker has opened it."""
+        if not future.done():
+            self.root.after(20, self._poll_connect, future, generation)
+            return
+
+        error = None
+        try:
+            camera = future.result()
+        except Exception as e:
+            camera, error = None, e
+        if generation != self.connect_generation:
+            # Cancelled or superseded by another camera ID
+            if camera:
+                self.camera_worker.submit(camera.close)
+            return
+
+        camera_id = self.connecting_id
+        self.connecting_id = None
+        if camera is None:
+            self.connect_started = None
+            self._reset_camera_controls()
+            message = f"Could not open camera {camera_id}"
+            if error is not None:
+                message += f": {error}"
+            self.status_var.set(message)
+            messagebox.showerror("Error", message)
+            return
+
+        self.camera = camera
+        # The preview queue is a single-slot mailbox: the grabber overwrites
+        # it with the newest frame and never waits for the UI
+        self.preview_queue = self.camera.subscribe("preview", depth=1)
 
         self.is_preview_running = True
-        self.stop_preview.clear()
 
         # Update buttons
-        self.start_camera_btn.config(state=tk.DISABLED)
-        self.stop_camera_btn.config(state=tk.NORMAL)
+        self.stop_camera_btn.config(text="⏹ Stop Camera")
         self.photo_btn.config(state=tk.NORMAL)
         self.record_btn.config(state=tk.NORMAL)
 
-        self.status_var.set(f"Camera {camera_id} started - {self.resolution_var.get()}")
+        self.status_var.set(f"Camera {camera_id} opened - waiting for first frame…")
 
-        # Start preview thread
-        self.preview_thread = threading.Thread(target=self._preview_loop, daemon=True)
-        self.preview_thread.start()
+        # Render on the Tk main thread
+        self._render_preview()
+        self._update_metrics()
 
     def _stop_camera(self):
-        """Stop the camera preview."""
+        """Stop the camera, or cancel opening it."""
         if self.is_recording:
             self._toggle_recording()
 
+        # Any connection still in progress is discarded when it completes
+        self.connect_generation += 1
+        self.connecting_id = None
+        self.connect_started = None
+
         self.is_preview_running = False
-        self.stop_preview.set()
+        if self.preview_job is not None:
+            self.root.after_cancel(self.preview_job)
+            self.preview_job = None
 
         if self.camera:
-            self.camera.close()
+            # Closing can block on the driver too; the worker runs it before
+            # any later open, so the device is free by then
+            self.camera_worker.submit(self._close_camera, self.camera)
             self.camera = None
 
         # Clear video display
         self.video_label.configure(image="")
+        self.preview_photo = None
+        if self.metrics_job is not None:
+            self.root.after_cancel(self.metrics_job)
+            self.metrics_job = None
+        self.metrics_var.set("")
 
-        # Update buttons
+        self._reset_camera_controls()
+        self.status_var.set("Camera stopped")
+
+    @staticmethod
+    def _close_camera(camera):
+        """Close a camera, finishing a recording still being started; runs on the worker."""
+        if camera.is_recording:
+            camera.stop_recording()
+        camera.close()
+
+    def _reset_camera_controls(self):
+        """Put the camera buttons back into the stopped state."""
         self.start_camera_btn.config(state=tk.NORMAL)
-        self.stop_camera_btn.config(state=tk.DISABLED)
+        self.stop_camera_btn.config(state=tk.DISABLED, text="⏹ Stop Camera")
         self.photo_btn.config(state=tk.DISABLED)
         self.record_btn.config(state=tk.DISABLED)
 
-        self.status_var.set("Camera stopped")
-
     def _toggle_camera(self):
         """Toggle camera on/off."""
-        if self.camera and self.camera.cap and self.camera.cap.isOpened():
+        if self.camera or self.connecting_id is not None:
             self._stop_camera()
         else:
             self._start_camera()
 
-    def _preview_loop(self):
-        """Main preview loop running in a separate thread."""
-        while self.is_preview_running and not self.stop_preview.is_set():
-            if self.camera and self.camera.cap and self.camera.cap.isOpened():
-                ret, frame = self.camera.cap.read()
-                if ret:
-                    # Write frame to video if recording
-                    if self.is_recording and self.camera.is_recording and self.camera.video_writer:
-                        self.camera.video_writer.write(frame)
-                    
-                    self._update_preview(frame)
-
-    def _update_preview(self, frame):
-        """Update the preview label with a new frame."""
-        # Convert BGR to RGB
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def _on_camera_id_change(self, *args):
+        """Switch to the newly selected camera if one is running."""
+        if self.camera is None and self.connecting_id is None:
+            return
+        # Wait for the spinbox to settle before reopening
+        if self.switch_job is not None:
+            self.root.after_cancel(self.switch_job)
+        self.switch_job = self.root.after(400, self._switch_camera)
+
+    def _switch_camera(self):
+        """Reopen the preview on the selected camera ID."""
+        self.switch_job = None
+        try:
+            camera_id = self.camera_id_var.get()
+        except tk.TclError:
+            return  # Not a number (yet)
 
-        # Resize to fit the label
-        label_width = self.video_label.winfo_width()
-        label_height = self.video_label.winfo_height()
+        active_id = self.camera.camera_id if self.camera else self.connecting_id
+        if active_id is None or camera_id == active_id:
+            return
+        if self.is_recording or self.recording_busy:
+            self.status_var.set("Stop recording before switching cameras")
+            return
+        self._stop_camera()
+        self._start_camera()
+
+    def _render_preview(self):
+        """Show the newest frame from the mailbox; runs on the Tk main thread."""
+        self.preview_job = None
+        if not self.is_preview_running:
+            return
+
+        # Recording is fed by its own hub subscription inside Camera; frames
+        # that arrived since the last tick were already replaced in the slot
+        frame = self.preview_queue.get(timeout=0)
+        if frame is not None:
+            self._update_preview(frame.image, frame.seq)
+            frame.release()
+
+            if self.connect_started is not None:
+                first_frame = time.monotonic() - self.connect_started
+                self.connect_started = None
+                self.status_var.set(
+                    f"Camera {self.camera.camera_id} started - {self.resolution_var.get()} "
+                    f"(first frame after {first_frame:.2f}s)"
+                )
+
+        # Frames arriving between ticks are simply replaced in the mailbox,
+        # so a longer period decimates the preview without touching capture
+        period_ms = max(PREVIEW_INTERVAL_MS, int(1000 / self._preview_rate()))
+        self.preview_job = self.root.after(period_ms, self._render_preview)
+
+    def _preview_rate(self) -> float:
+        """Preview frames per second after the cap and any decimation."""
+        try:
+            cap = max(1, int(self.preview_fps_var.get()))
+        except ValueError:
+            cap = 30
+        return cap / self.preview_decimation
+
+    def _govern_preview(self, metrics):
+        """
+        Thin out the preview while the video writer falls behind.
+
+        Recording takes priority: whenever the writer's throughput drops
+        below what the camera delivers (or its queue starts filling up), the
+        preview rate is halved; after a few healthy seconds it is doubled
+        again, up to the configured cap.
+        """
+        if not metrics["recording"] or self.recording_start_time is None:
+            self.preview_decimation = 1
+            self.preview_healthy_since = None
+            return
 
-        if label_width > 1 and label_height > 1:
-            frame_rgb = cv2.resize(frame_rgb, (label_width, label_height))
+        # The rolling rates need a full window of the recording first
+        now = time.monotonic()
+        if (datetime.now() - self.recording_start_time).total_seconds() < 2.0:
+            return
 
-        # Convert to ImageTk format
-        img = Image.fromarray(frame_rgb)
-        img_tk = ImageTk.PhotoImage(image=img)
+        target = min(self.camera.settings["fps"], metrics["capture_fps"])
+        behind = (metrics["write_fps"] < 0.9 * target
+                  or metrics["queue_depth"] > metrics["queue_size"] // 4)
+        if behind:
+            self.preview_decimation = min(self.preview_decimation * 2, MAX_PREVIEW_DECIMATION)
+            self.preview_healthy_since = None
+        elif self.preview_decimation > 1:
+            if self.preview_healthy_since is None:
+                self.preview_healthy_since = now
+            elif now - self.preview_healthy_since >= 3.0:
+                self.preview_decimation //= 2
+                self.preview_healthy_since = now
+
+    def _on_preview_resize(self, event):
+        """Remember the preview area size instead of querying it per frame."""
+        self.preview_size = (event.width, event.height)
+
+    def _update_preview(self, frame, seq=0):
+        """Update the preview label with a new frame."""
+        label_width, label_height = self.preview_size
+        if label_width <= 1 or label_height <= 1:
+            return  # Not laid out yet
+
+        if TRACER.enabled:
+            t0 = time.monotonic_ns()
+
+        # Fit the frame inside the label keeping its aspect ratio; the
+        # label's black background fills the rest
+        height, width = frame.shape[:2]
+        scale = min(label_width / width, label_height / height)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+        # Resize first so the color conversion only touches preview pixels
+        interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
+        small = cv2.resize(frame, size, interpolation=interpolation)
+        img = Image.fromarray(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+
+        if TRACER.enabled:
+            TRACER.span(PROCESS, seq, t0)
+            t0 = time.monotonic_ns()
+
+        # Update the existing photo in place; only a new size needs a new one
+        photo = self.preview_photo
+        if photo is not None and (photo.width(), photo.height()) == size:
+            photo.paste(img)
+        else:
+            self.preview_photo = ImageTk.PhotoImage(image=img)
+            self.video_label.configure(image=self.preview_photo)
 
-        # Update label
-        self.video_label.configure(image=img_tk)
-        self.video_label.image = img_tk  # Keep reference
+        if TRACER.enabled:
+            TRACER.span(DISPLAY, seq, t0)
 
     def _take_photo(self):
         """Take a photo."""
         if not self.camera:
             return
+        pressed = time.monotonic()
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"photo_{timestamp}.{self.photo_format_var.get()}"
 
-        filepath = self.camera.capture_photo(filename)
+        # The frame on screen when the button was pressed is already in the
+        # grabber's history; encoding happens on the camera's photo pool, and
+        # we poll for the result so the Tk main loop is never blocked
+        future = self.camera.capture_photo_async(filename, timestamp=pressed)
+        if future is None:
+            self.status_var.set("Failed to take photo")
+            messagebox.showerror("Error", "Failed to capture photo")
+            return
+
+        self.status_var.set("Saving photo...")
+        self._poll_photo(future)
+
+    def _poll_photo(self, future):
+        """Report the result of an asynchronous photo once it is written."""
+        if not future.done():
+            self.root.after(20, self._poll_photo, future)
+            return
+
+        filepath = future.result()
         if filepath:
             self.status_var.set(f"Photo saved: {filepath}")
             messagebox.showinfo("Photo Taken", f"Saved to:\n{filepath}")
         else:
             self.status_var.set("Failed to take photo")
-            messagebox.showerror("Error", "Failed to capture photo")
+            messagebox.showerror("Error", "Failed to save photo")
 
     def _toggle_recording(self):
         """Toggle video recording."""
-        if not self.camera:
+        if not self.camera or self.recording_busy:
             return
 
+        # Starting probes codecs and opens the microphone, stopping drains
+        # the writer and finalizes the files; both run on the camera worker
+        camera = self.camera
+        self.recording_busy = True
+        self.record_btn.config(state=tk.DISABLED)
         if self.is_recording:
-            # Stop recording
-            filepath = self.camera.stop_recording()
             self.is_recording = False
-            self.record_btn.config(text="🔴 Start Recording")
-            self.record_btn.style = ttk.Style()
             self.recording_time_var.set("")
-            self.play_video_btn.config(state=tk.NORMAL)
-            self.current_video_file = filepath
-
-            if filepath:
-                self.status_var.set(f"Video saved: {filepath}")
-                messagebox.showinfo("Recording Stopped", f"Saved to:\n{filepath}\n\nClick 'Play Last Video' to watch")
+            self.status_var.set("Finishing recording…")
+            future = self.camera_worker.submit(camera.stop_recording)
+            self._poll_recording(future, self._recording_stopped, camera)
         else:
-            # Start recording
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"video_{timestamp}.mp4"
 
-            if self.camera.start_recording(filename):
-                self.is_recording = True
-                self.recording_start_time = datetime.now()
-                self.record_btn.config(text="⏹ Stop Recording")
-                self.play_video_btn.config(state=tk.DISABLED)
-                self.status_var.set("Recording...")
-                self.current_video_file = None
+            # Audio is captured by the camera alongside the video, streamed
+            # to a .wav next to it
+            settings = {
+                "audio_enabled": self.mic_enabled_var.get(),
+                "audio_device": self._selected_mic(),
+                "audio_silence_pause": self.mic_silence_var.get(),
+            }
+            self.status_var.set("Starting recording…")
+            future = self.camera_worker.submit(self._begin_recording, camera, filename, settings)
+            self._poll_recording(future, self._recording_started)
+
+    @staticmethod
+    def _begin_recording(camera, filename, settings):
+        """Apply recording settings and start; runs on the camera worker thread."""
+        camera.update_settings(**settings)
+        return camera.start_recording(filename)
+
+    def _poll_recording(self, future, done, *args):
+        """Call done(result, *args) on the Tk thread once the worker finishes."""
+        if not future.done():
+            self.root.after(20, self._poll_recording, future, done, *args)
+            return
+        self.recording_busy = False
+        self.record_btn.config(state=tk.NORMAL if self.camera else tk.DISABLED)
+        try:
+            result = future.result()
+        except Exception as e:
+            self._recording_failed(e)
+            return
+        done(result, *args)
 
-                # Start recording timer
-                self._update_recording_time()
+    def _recording_failed(self, error):
+        """Reset the recording controls after starting or stopping raised."""
+        self.is_recording = False
+        self.recording_time_var.set("")
+        self.record_btn.config(text="🔴 Start Recording")
+        self.play_video_btn.config(state=tk.NORMAL)
+        self.pre_event_spinbox.config(state=tk.NORMAL)
+        self.status_var.set(f"Recording failed: {error}")
+
+        camera = self.camera
+        if camera and camera.is_recording:
+            # Leave the camera ready for the next recording
+            self.camera_worker.submit(camera.stop_recording)
+        messagebox.showerror("Error", f"Recording failed: {error}")
+
+    def _recording_started(self, started):
+        """Switch the controls to recording once the worker has started it."""
+        if not started or not self.camera:
+            self.status_var.set("Failed to start recording")
+            return
+        self.is_recording = True
+        self.recording_start_time = datetime.now()
+        self.record_btn.config(text="⏹ Stop Recording")
+        self.play_video_btn.config(state=tk.DISABLED)
+        self.pre_event_spinbox.config(state=tk.DISABLED)
+        self.status_var.set("Recording...")
+        self.current_video_file = None
+
+        # Start recording timer
+        self._update_recording_time()
+        self._update_level_meter()
+
+    def _recording_stopped(self, filepath, camera):
+        """Report the saved recording once the worker has finished it."""
+        self.record_btn.config(text="🔴 Start Recording")
+        self.play_video_btn.config(state=tk.NORMAL)
+        self.pre_event_spinbox.config(state=tk.NORMAL)
+        self.current_video_file = filepath
+
+        if filepath:
+            self.status_var.set(f"Video saved: {filepath}")
+            message = f"Saved to:\n{filepath}"
+            audio = camera.get_recording_stats().get("audio")
+            if audio:
+                message += f"\n{audio['file']}"
+                lost = audio["overruns"] + audio["input_overflows"]
+                if lost:
+                    message += f"\n\nWarning: {lost} audio buffers were lost"
+            messagebox.showinfo("Recording Stopped", f"{message}\n\nClick 'Play Last Video' to watch")
 
     def _play_last_video(self):
         """Play the last recorded video."""
@@ -423,6 +791,40 @@ class CameraGUI:
             self.recording_time_var.set(f"⏺ Recording: {elapsed_str}")
             self.root.after(1000, self._update_recording_time)
 
+    def _update_level_meter(self):
+        """Show the microphone level; polled on the Tk thread while recording."""
+        if self.meter_job is not None:
+            self.root.after_cancel(self.meter_job)
+        self.meter_job = None
+        recorder = self.camera.audio_recorder if self.camera else None
+        if not self.is_recording or recorder is None:
+            self.mic_meter["value"] = 0
+            self.mic_level_var.set("")
+            return
+
+        # Levels are computed per chunk on the audio writer thread; this
+        # only reads the latest values
+        levels = recorder.levels()
+        self.mic_meter["value"] = max(0.0, levels["rms_db"] - METER_FLOOR_DB)
+        text = f"Peak {levels['peak_db']:.0f} dB  RMS {levels['rms_db']:.0f} dB"
+        if levels["paused"]:
+            text += "  (silence - not writing)"
+        self.mic_level_var.set(text)
+        self.meter_job = self.root.after(METER_INTERVAL_MS, self._update_level_meter)
+
+    def _update_metrics(self):
+        """Refresh the metrics bar a few times per second on the Tk thread."""
+        self.metrics_job = None
+        if self.camera is None or not self.is_preview_running:
+            return
+        metrics = self.camera.get_metrics()
+        self._govern_preview(metrics)
+        text = format_metrics(metrics)
+        if self.preview_decimation > 1:
+            text = f"preview {self._preview_rate():.1f} fps (reduced while recording) | {text}"
+        self.metrics_var.set(text)
+        self.metrics_job = self.root.after(250, self._update_metrics)
+
     def _save_settings(self):
         """Save current settings to file."""
         filepath = filedialog.asksaveasfilename(
@@ -434,6 +836,8 @@ class CameraGUI:
             settings = {
                 "resolution": self.resolution_var.get(),
                 "fps": self.fps_var.get(),
+                "preview_fps": self.preview_fps_var.get(),
+                "pre_event_seconds": self.pre_event_var.get(),
                 "photo_format": self.photo_format_var.get(),
                 "video_format": self.video_format_var.get(),
                 "camera_id": self.camera_id_var.get()
@@ -459,6 +863,11 @@ class CameraGUI:
                     self.resolution_var.set(settings["resolution"])
                 if "fps" in settings:
                     self.fps_var.set(settings["fps"])
+                if "preview_fps" in settings:
+                    self.preview_fps_var.set(settings["preview_fps"])
+                if "pre_event_seconds" in settings:
+                    self.pre_event_var.set(settings["pre_event_seconds"])
+                    self._on_pre_event_change()
                 if "photo_format" in settings:
                     self.photo_format_var.set(settings["photo_format"])
                 if "video_format" in settings:
@@ -479,6 +888,8 @@ class CameraGUI:
         """Handle window close event."""
         self._stop_camera()
         self.root.destroy()
+        # Let the worker finish closing the device after the window is gone
+        self.camera_worker.shutdown(wait=True)
 
 
 def main():
@@ -7,8 +7,13 @@ Command-line interface for the simple camera application.
 
 import argparse
 import sys
-import time
 from camera import Camera
+from metrics import MetricsServer
+
+
+def camera_source(value: str):
+    """Parse a camera ID, keeping non-numeric source specs as strings."""
+    return int(value) if value.isdigit() else value
 
 
 def cmd_photo(args):
@@ -27,11 +32,7 @@ def cmd_photo(args):
 
         # Capture photo(s)
         if args.count > 1:
-            for i in range(args.count):
-                filename = f"{args.name}_{i+1}" if args.name else None
-                cam.capture_photo(filename)
-                if i < args.count - 1:
-                    time.sleep(args.interval)
+            cam.capture_burst(args.count, args.interval, args.name)
         else:
             cam.capture_photo(args.name)
 
@@ -51,18 +52,48 @@ def cmd_video(args):
             cam.update_settings(fps=args.fps)
         if args.format:
             cam.update_settings(video_format=args.format)
+        if args.vfr:
+            cam.update_settings(frame_rate_mode="vfr")
+        if args.writer_queue:
+            cam.update_settings(writer_threaded=True, writer_queue_size=args.writer_queue)
+        if args.when_full:
+            cam.update_settings(writer_full_policy=args.when_full)
+        if args.segment_seconds:
+            cam.update_settings(segment_seconds=args.segment_seconds)
+        if args.segment_mb:
+            cam.update_settings(segment_megabytes=args.segment_mb)
+        if args.pre_event_mb:
+            cam.update_settings(pre_event_megabytes=args.pre_event_mb)
+        if args.pre_event:
+            # Starts buffering right away
+            cam.update_settings(pre_event_seconds=args.pre_event)
 
-        if args.duration:
-            # Timed recording
-            cam.record_video(args.duration, args.name)
-        else:
-            # Manual recording
-            print("Press Enter to start recording, then Enter again to stop")
-            input()
-            cam.start_recording(args.name)
-            print("Recording... Press Enter to stop")
-            input()
-            cam.stop_recording()
+        server = None
+        if args.metrics_port is not None:
+            try:
+                server = MetricsServer(args.metrics_port, cam.get_metrics,
+                                       cam.metrics.encode_histogram)
+            except OSError as e:
+                print(f"Error: Could not serve metrics on port {args.metrics_port}: {e}")
+                sys.exit(1)
+            server.start()
+            print(f"Serving metrics on http://127.0.0.1:{server.port}/metrics")
+
+        try:
+            if args.duration:
+                # Timed recording
+                cam.record_video(args.duration, args.name)
+            else:
+                # Manual recording
+                print("Press Enter to start recording, then Enter again to stop")
+                input()
+                cam.start_recording(args.name)
+                print("Recording... Press Enter to stop")
+                input()
+                cam.stop_recording()
+        finally:
+            if server:
+                server.stop()
 
 
 def cmd_preview(args):
@@ -93,6 +124,21 @@ def cmd_settings(args):
             "photo_format": "png",
             "video_format": "mp4",
             "video_codec": "mp4v",
+            "frame_rate_mode": "cfr",
+            "writer_threaded": False,
+            "writer_queue_size": 60,
+            "writer_full_policy": "block",
+            "audio_enabled": False,
+            "audio_device": None,
+            "audio_rate": 44100,
+            "audio_channels": 1,
+            "audio_silence_pause": False,
+            "audio_silence_db": -50.0,
+            "audio_silence_seconds": 2.0,
+            "segment_seconds": 0,
+            "segment_megabytes": 0,
+            "pre_event_seconds": 0,
+            "pre_event_megabytes": 200,
             "brightness": -1,
             "contrast": -1,
             "saturation": -1,
@@ -110,19 +156,123 @@ def cmd_list(args):
     cameras = cam.list_cameras()
     if cameras:
         print("Available cameras:")
-        for i in cameras:
-            print(f"  - Camera ID: {i}")
+        for device in cameras:
+            path = f" ({device['path']})" if device["path"] else ""
+            backends = ", ".join(device["backends"])
+            print(f"  - Camera ID: {device['index']}{path} - {device['name']} [{backends}]")
     else:
         print("No cameras found")
 
 
+def cmd_codecs(args):
+    """Show or refresh the video codec capability cache."""
+    cam = Camera(args.camera_id)
+    cache = cam.codec_cache
+
+    if args.clear:
+        cache.clear()
+        print(f"Codec cache cleared: {cache.path}")
+        return
+
+    if args.refresh:
+        if args.resolution:
+            width, height = map(int, args.resolution.split('x'))
+        else:
+            width, height = cam.settings["resolution"]
+        fps = args.fps or cam.settings["fps"]
+        print(f"Probing codecs for {width}x{height} @ {fps} FPS...")
+        cache.probe(".mp4", (width, height), fps)
+
+    entries = cache.entries()
+    if not entries:
+        print("Codec cache is empty (it is filled by the first recording, "
+              "or run 'codecs --refresh')")
+        return
+
+    print(f"Codec cache: {cache.path}")
+    print(f"OpenCV build: {cache.build_id()}")
+    for entry in entries.values():
+        width, height = entry["resolution"]
+        current = "" if entry["build"] == cache.build_id() else " (other OpenCV build)"
+        print(f"  {entry['container']} {width}x{height} @ {entry['fps']} FPS, "
+              f"probed {entry['probed_at']}{current}")
+        for result in entry["results"]:
+            status = "ok" if result["ok"] else "unavailable"
+            print(f"    - {result['fourcc']} ({result['ext']}): {status}")
+
+
+def cmd_bench(args):
+    """Run the capture/encode/write benchmark suite."""
+    import bench
+
+    sources = args.source or [args.camera_id, "synthetic:?realtime=0"]
+    resolutions = [tuple(map(int, r.split('x'))) for r in args.resolutions.split(',')]
+    report = bench.run_benchmarks(
+        sources,
+        resolutions=resolutions,
+        photo_formats=args.formats.split(','),
+        video_codecs=args.codecs.split(','),
+        frames=args.frames,
+        photos=args.photos,
+    )
+    print()
+    print(bench.format_table(report))
+    if args.json:
+        bench.save_report(report, args.json)
+
+
+def run_profiled(args):
+    """Run the selected command under cProfile and/or tracemalloc."""
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    profiler = cProfile.Profile() if args.profile else None
+    if args.profile_memory:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+
+    try:
+        if profiler:
+            profiler.runcall(args.func, args)
+        else:
+            args.func(args)
+    finally:
+        # Report even when the command exits early or is interrupted; the
+        # allocation snapshot comes first so reporting does not show up in it
+        if args.profile_memory:
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        if profiler:
+            profiler.dump_stats(args.profile)
+            print(f"\nProfile saved: {args.profile} (view with: python -m pstats {args.profile})")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        if args.profile_memory:
+            print(f"Top {args.profile_memory} allocation sites:")
+            for stat in after.compare_to(before, "lineno")[:args.profile_memory]:
+                print(f"  {stat}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Simple Camera - Capture photos and videos from your camera"
     )
     parser.add_argument(
-        "--camera-id", "-c", type=int, default=0,
-        help="Camera device ID (default: 0)"
+        "--camera-id", "-c", "--source", type=camera_source, default=0,
+        help="Camera device ID (default: 0) or a virtual source such as "
+             "synthetic:1280x720@30, file:clip.mp4 or images:frames/"
+    )
+    parser.add_argument(
+        "--trace", metavar="FILE",
+        help="Record per-frame pipeline timings to a Chrome trace JSON file"
+    )
+    parser.add_argument(
+        "--profile", metavar="FILE",
+        help="Profile the command with cProfile and save the stats to FILE (.pstats)"
+    )
+    parser.add_argument(
+        "--profile-memory", type=int, metavar="N",
+        help="Trace allocations with tracemalloc and show the top N allocation sites"
     )
 
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
@@ -136,7 +286,7 @@ def main():
     )
     photo_parser.add_argument(
         "--interval", "-i", type=float, default=1.0,
-        help="Interval between photos (seconds)"
+        help="Interval between photos (seconds, 0 for native camera rate)"
     )
     photo_parser.add_argument(
         "--resolution", "-r", help="Resolution (e.g., 1280x720)"
@@ -164,6 +314,39 @@ def main():
         "--format", "-f", choices=["mp4", "avi", "mkv"],
         help="Video format"
     )
+    video_parser.add_argument(
+        "--vfr", action="store_true",
+        help="Variable frame rate: write every captured frame and save "
+             "per-frame timestamps instead of pacing to a constant FPS"
+    )
+    video_parser.add_argument(
+        "--writer-queue", type=int,
+        help="Write frames on a background thread with a queue of this many frames"
+    )
+    video_parser.add_argument(
+        "--when-full", choices=["block", "drop_oldest", "drop_newest"],
+        help="What the writer queue does when full (default: block)"
+    )
+    video_parser.add_argument(
+        "--metrics-port", type=int, metavar="PORT",
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while recording"
+    )
+    video_parser.add_argument(
+        "--segment-seconds", type=float, metavar="N",
+        help="Split the recording into files of N seconds"
+    )
+    video_parser.add_argument(
+        "--segment-mb", type=float, metavar="N",
+        help="Split the recording into files of about N megabytes"
+    )
+    video_parser.add_argument(
+        "--pre-event", type=float, metavar="N",
+        help="Start the recording with the N seconds before it was started"
+    )
+    video_parser.add_argument(
+        "--pre-event-mb", type=float, metavar="N",
+        help="Memory ceiling of the pre-event buffer in megabytes (default: 200)"
+    )
     video_parser.set_defaults(func=cmd_video)
 
     # Preview command
@@ -186,6 +369,55 @@ def main():
     )
     settings_parser.set_defaults(func=cmd_settings)
 
+    # Codecs command
+    codecs_parser = subparsers.add_parser(
+        "codecs", help="Show or refresh the video codec cache"
+    )
+    codecs_parser.add_argument(
+        "--refresh", action="store_true",
+        help="Probe all codecs again for the given resolution and FPS"
+    )
+    codecs_parser.add_argument(
+        "--clear", action="store_true", help="Delete all cached results"
+    )
+    codecs_parser.add_argument(
+        "--resolution", "-r", help="Resolution to probe (e.g., 1920x1080)"
+    )
+    codecs_parser.add_argument(
+        "--fps", type=int, help="Frames per second to probe"
+    )
+    codecs_parser.set_defaults(func=cmd_codecs)
+
+    # Bench command
+    bench_parser = subparsers.add_parser(
+        "bench", help="Benchmark capture, photo encoding and video writing"
+    )
+    bench_parser.add_argument(
+        "--source", "-s", action="append", type=camera_source,
+        help="Source to benchmark (repeatable; default: the camera and a "
+             "synthetic source)"
+    )
+    bench_parser.add_argument(
+        "--resolutions", default="640x480,1280x720,1920x1080",
+        help="Comma-separated resolutions"
+    )
+    bench_parser.add_argument(
+        "--formats", default="png,jpg,bmp", help="Comma-separated photo formats"
+    )
+    bench_parser.add_argument(
+        "--codecs", default="avc1,mp4v,MJPG", help="Comma-separated video codecs"
+    )
+    bench_parser.add_argument(
+        "--frames", type=int, default=120,
+        help="Frames to capture and write per codec (default: 120)"
+    )
+    bench_parser.add_argument(
+        "--photos", type=int, default=10,
+        help="Photos to encode per format (default: 10)"
+    )
+    bench_parser.add_argument("--json", help="Write machine-readable results to this file")
+    bench_parser.set_defaults(func=cmd_bench)
+
     # List command
     list_parser = subparsers.add_parser("list", help="List available cameras")
     list_parser.set_defaults(func=cmd_list)
@@ -196,7 +428,14 @@ def main():
         parser.print_help()
         sys.exit(0)
 
-    args.func(args)
+    if args.trace:
+        import tracing
+        tracing.enable(args.trace)
+
+    if args.profile or args.profile_memory:
+        run_profiled(args)
+    else:
+        args.func(args)
 
 
 if __name__ == "__main__":
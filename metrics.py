@@ -0,0 +1,351 @@
+"""
+Pipeline Metrics
+
+Live health figures for a running camera: rolling capture and write frame
+rates, dropped frames, writer queue depth, encode latency percentiles and
+bytes written. Counters are updated by the capture, writer and photo
+threads and read as plain values, so polling them never takes a lock on
+the capture loop.
+
+MetricsServer exposes the same figures in Prometheus text format on a
+local HTTP port for unattended recordings.
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class RateMeter:
+    """Rolling events-per-second over a short time window."""
+
+    def __init__(self, window: float = 2.0, maxlen: int = 1024):
+        """
+        Initialize the meter.
+
+        Args:
+            window: Length of the averaging window in seconds
+            maxlen: Maximum number of event times kept
+        """
+        self.window = window
+        self._times: deque = deque(maxlen=maxlen)
+        self._first: Optional[float] = None
+
+    def mark(self, timestamp: Optional[float] = None):
+        """Record one event at a monotonic timestamp (default: now)."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self._first is None:
+            self._first = timestamp
+        self._times.append(timestamp)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        """Events per second over the last window."""
+        if self._first is None:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        # Copying the deque is a single C call, so it is safe against
+        # concurrent appends
+        times = list(self._times)
+        cutoff = now - self.window
+        recent = sum(1 for t in times if t >= cutoff)
+        # A floor on the span keeps the first few events from reading as
+        # thousands per second
+        span = max(min(self.window, now - self._first), self.window / 4)
+        return recent / span
+
+    def reset(self):
+        """Forget all recorded events."""
+        self._times.clear()
+        self._first = None
+
+
+# Upper bounds (seconds) of the encode latency histogram buckets
+ENCODE_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0]
+
+
+class PipelineMetrics:
+    """
+    Counters and rolling statistics for the capture pipeline.
+
+    Frame counters have a single writer thread (capture or video writer),
+    so updates need no locking; only the byte count, shared by the photo
+    encoder threads and the recording in progress, takes a lock. Frame
+    counters are read without locking and may be one event stale, which is
+    fine for monitoring.
+    """
+
+    def __init__(self, latency_samples: int = 512):
+        """
+        Initialize the metrics.
+
+        Args:
+            latency_samples: Number of recent encode latencies kept for
+                             the percentiles
+        """
+        self.frames_read = 0
+        self.read_failures = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+        self.bytes_written = 0
+        self.capture_rate = RateMeter()
+        self.write_rate = RateMeter()
+        self._bytes_lock = threading.Lock()
+        self._live_file: Optional[Path] = None
+
+        self._latencies = np.zeros(latency_samples, dtype=np.float64)
+        self._latency_count = 0
+        # Cumulative histogram: one count per bucket plus +Inf
+        self._encode_buckets = [0] * (len(ENCODE_BUCKETS) + 1)
+        self._encode_sum = 0.0
+
+    def frame_read(self, timestamp: Optional[float] = None):
+        """Count a frame read from the device."""
+        self.frames_read += 1
+        self.capture_rate.mark(timestamp)
+
+    def read_failed(self):
+        """Count a failed read."""
+        self.read_failures += 1
+
+    def frame_written(self, encode_seconds: float):
+        """Count a frame written to the recording and its encode time."""
+        self._latencies[self._latency_count % len(self._latencies)] = encode_seconds
+        self._latency_count += 1
+        self._encode_buckets[bisect.bisect_left(ENCODE_BUCKETS, encode_seconds)] += 1
+        self._encode_sum += encode_seconds
+        self.frames_written += 1
+        self.write_rate.mark()
+
+    def frames_lost(self, count: int = 1):
+        """Count frames dropped because the writer could not keep up."""
+        self.frames_dropped += count
+
+    def reconnected(self):
+        """Count a reopened capture device."""
+        self.reconnects += 1
+
+    def add_bytes(self, count: int):
+        """Count bytes written to disk."""
+        with self._bytes_lock:
+            self.bytes_written += count
+
+    def track_file(self, path: Path):
+        """Include the current size of a file being written in bytes_written."""
+        with self._bytes_lock:
+            self._live_file = path
+
+    def finish_file(self):
+        """Count the final size of the tracked file and stop tracking it."""
+        with self._bytes_lock:
+            if self._live_file is not None:
+                self.bytes_written += self._file_size(self._live_file)
+                self._live_file = None
+
+    def disk_bytes(self) -> int:
+        """Bytes written so far, including the file being written."""
+        # Taken under the lock so finishing a file never makes the total
+        # jump back and forth
+        with self._bytes_lock:
+            total = self.bytes_written
+            if self._live_file is not None:
+                total += self._file_size(self._live_file)
+        return total
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    def encode_histogram(self) -> Dict[str, Any]:
+        """
+        Get the cumulative encode latency histogram.
+
+        Returns:
+            Dictionary with buckets (list of (upper bound, cumulative count),
+            ending with +Inf), sum in seconds and count
+        """
+        counts = list(self._encode_buckets)
+        buckets = []
+        total = 0
+        for bound, count in zip(ENCODE_BUCKETS + [float("inf")], counts):
+            total += count
+            buckets.append((bound, total))
+        return {"buckets": buckets, "sum": self._encode_sum, "count": total}
+
+    def encode_percentiles(self) -> Dict[str, float]:
+        """
+        Get encode latency percentiles over the recent samples.
+
+        Returns:
+            Dictionary with p50_ms and p99_ms (0.0 before the first frame)
+        """
+        filled = min(self._latency_count, len(self._latencies))
+        if filled == 0:
+            return {"p50_ms": 0.0, "p99_ms": 0.0}
+        p50, p99 = np.percentile(self._latencies[:filled], [50, 99]) * 1000
+        return {"p50_ms": float(p50), "p99_ms": float(p99)}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current values.
+
+        Returns:
+            Dictionary with rolling capture/write FPS, frame counters,
+            bytes written and encode latency percentiles
+        """
+        now = time.monotonic()
+        snapshot = {
+            "capture_fps": self.capture_rate.rate(now),
+            "write_fps": self.write_rate.rate(now),
+            "frames_read": self.frames_read,
+            "read_failures": self.read_failures,
+            "reconnects": self.reconnects,
+            "frames_written": self.frames_written,
+            "dropped": self.frames_dropped,
+            "bytes_written": self.disk_bytes(),
+        }
+        snapshot.update(self.encode_percentiles())
+        return snapshot
+
+
+def format_metrics(snapshot: Dict[str, Any]) -> str:
+    """
+    Render a metrics snapshot as a single status line.
+
+    Args:
+        snapshot: Dictionary returned by Camera.get_metrics()
+
+    Returns:
+        Human-readable one-line summary
+    """
+    parts = [
+        f"capture {snapshot['capture_fps']:.1f} fps",
+        f"write {snapshot['write_fps']:.1f} fps",
+        f"dropped {snapshot['dropped']}",
+    ]
+    if snapshot.get("queue_size"):
+        parts.append(f"queue {snapshot['queue_depth']}/{snapshot['queue_size']}")
+    parts.append(f"encode p50 {snapshot['p50_ms']:.1f} ms p99 {snapshot['p99_ms']:.1f} ms")
+    parts.append(f"{snapshot['bytes_written'] / 1e6:.1f} MB")
+    if "audio_overruns" in snapshot:
+        parts.append(f"audio overruns {snapshot['audio_overruns']}")
+    return " | ".join(parts)
+
+
+def _prometheus_text(snapshot: Dict[str, Any], histogram: Dict[str, Any]) -> str:
+    """Render a metrics snapshot in the Prometheus text exposition format."""
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, help_text: str, value):
+        lines.append(f"# HELP simple_camera_{name} {help_text}")
+        lines.append(f"# TYPE simple_camera_{name} {kind}")
+        lines.append(f"simple_camera_{name} {value}")
+
+    metric("frames_read_total", "counter", "Frames read from the capture device.",
+           snapshot["frames_read"])
+    metric("frames_written_total", "counter", "Frames written to recordings.",
+           snapshot["frames_written"])
+    metric("frames_dropped_total", "counter", "Frames dropped by the video writer queue.",
+           snapshot["dropped"])
+    metric("read_failures_total", "counter", "Failed reads from the capture device.",
+           snapshot["read_failures"])
+    metric("reconnects_total", "counter", "Times the capture device was reopened.",
+           snapshot["reconnects"])
+    metric("disk_bytes_total", "counter", "Bytes of photos and video written to disk.",
+           snapshot["bytes_written"])
+    metric("writer_queue_depth", "gauge", "Frames waiting for the video writer.",
+           snapshot["queue_depth"])
+    metric("writer_queue_size", "gauge", "Capacity of the video writer queue.",
+           snapshot["queue_size"])
+    metric("capture_fps", "gauge", "Rolling capture frame rate.",
+           f"{snapshot['capture_fps']:.3f}")
+    metric("write_fps", "gauge", "Rolling video write frame rate.",
+           f"{snapshot['write_fps']:.3f}")
+    metric("recording", "gauge", "1 while a recording is in progress.",
+           int(snapshot["recording"]))
+
+    name = "simple_camera_encode_seconds"
+    lines.append(f"# HELP {name} Time to encode and write one video frame.")
+    lines.append(f"# TYPE {name} histogram")
+    for bound, count in histogram["buckets"]:
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f'{name}_bucket{{le="{le}"}} {count}')
+    lines.append(f"{name}_sum {histogram['sum']:.6f}")
+    lines.append(f"{name}_count {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Background HTTP server exposing metrics in Prometheus text format.
+
+    Every scrape of /metrics takes a fresh snapshot through the collect
+    callbacks; nothing is cached and the capture loop is never locked.
+    """
+
+    def __init__(self, port: int, collect: Callable[[], Dict[str, Any]],
+                 histogram: Callable[[], Dict[str, Any]], host: str = "127.0.0.1"):
+        """
+        Initialize the server (call start() to begin serving).
+
+        Args:
+            port: TCP port to listen on (0 picks a free port)
+            collect: Returns a snapshot as from Camera.get_metrics()
+            histogram: Returns an encode histogram as from
+                       PipelineMetrics.encode_histogram()
+            host: Address to bind; localhost only by default
+        """
+        self.collect = collect
+        self.histogram = histogram
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = _prometheus_text(server.collect(), server.histogram()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Keep scrapes out of the recording progress line
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        """Port the server is listening on."""
+        return self._httpd.server_address[1]
+
+    def start(self):
+        """Start serving on a daemon thread."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="MetricsServer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        if self._thread:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
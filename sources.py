@@ -0,0 +1,394 @@
+"""
+Virtual Camera Sources
+
+Hardware-free frame sources that behave like cv2.VideoCapture, so capture,
+encode and recording paths can be exercised and benchmarked without a
+webcam.
+
+Sources are selected with a spec string passed as the camera ID:
+
+    synthetic[:WIDTHxHEIGHT[@FPS]][?pattern=gradient|noise&realtime=0]
+    file:PATH[?loop=0&realtime=0]
+    images:GLOB_OR_DIRECTORY[?fps=30&loop=0&realtime=0]
+
+Generated and file-backed sources are paced to their frame rate by default,
+like a real camera; `realtime=0` delivers frames as fast as possible to
+measure throughput ceilings.
+"""
+
+import cv2
+import glob
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Optional, Union, List, Tuple, Dict
+from urllib.parse import parse_qs
+
+import numpy as np
+
+
+class VirtualSource(ABC):
+    """Base class implementing the cv2.VideoCapture contract and pacing."""
+
+    backend_name = "VIRTUAL"
+
+    def __init__(self, fps: float = 30.0, realtime: bool = True):
+        """
+        Initialize the source.
+
+        Args:
+            fps: Nominal frame rate
+            realtime: Pace grab() to the frame rate (False: as fast as possible)
+        """
+        self.fps = fps
+        self.realtime = realtime
+        self.frame_index = -1
+        self._opened = True
+        self._start: Optional[float] = None
+
+    def isOpened(self) -> bool:
+        """Whether the source can deliver frames."""
+        return self._opened
+
+    def release(self):
+        """Close the source."""
+        self._opened = False
+
+    def getBackendName(self) -> str:
+        """Name reported in place of the OpenCV backend."""
+        return self.backend_name
+
+    def _wait_for_next(self):
+        """Sleep until the next frame is due when pacing in real time."""
+        if not self.realtime or self.fps <= 0:
+            return
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+            return
+        due = self._start + (self.frame_index + 1) / self.fps
+        if due > now:
+            time.sleep(due - now)
+        elif now - due > 1.0:
+            # Fell far behind (e.g. the consumer paused); restart the clock
+            # instead of bursting to catch up
+            self._start = now - (self.frame_index + 1) / self.fps
+
+    def grab(self) -> bool:
+        """Advance to the next frame."""
+        if not self._opened:
+            return False
+        self._wait_for_next()
+        if not self._advance():
+            return False
+        self.frame_index += 1
+        return True
+
+    def _advance(self) -> bool:
+        """Prepare the next frame; return False when the source is exhausted."""
+        return True
+
+    def retrieve(self, image: Optional[np.ndarray] = None, flag: int = 0) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Render the grabbed frame.
+
+        Args:
+            image: Optional destination buffer, reused if its shape matches
+            flag: Ignored, for cv2.VideoCapture compatibility
+
+        Returns:
+            (True, image) on success, (False, None) if nothing was grabbed
+        """
+        if not self._opened or self.frame_index < 0:
+            return False, None
+        shape = self._shape()
+        if image is None or image.shape != shape or image.dtype != np.uint8:
+            image = np.empty(shape, dtype=np.uint8)
+        self._render(image)
+        return True, image
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        """Grab and retrieve the next frame."""
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    @abstractmethod
+    def _shape(self) -> Tuple[int, int, int]:
+        """Shape (height, width, 3) of the frames this source delivers."""
+
+    @abstractmethod
+    def _render(self, image: np.ndarray):
+        """Fill `image` with the current frame."""
+
+    def get(self, prop_id: int) -> float:
+        """Get a capture property (size, FPS and position are supported)."""
+        height, width, _ = self._shape()
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(width)
+        if prop_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(height)
+        if prop_id == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        if prop_id == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index + 1)
+        return 0.0
+
+    def set(self, prop_id: int, value: float) -> bool:
+        """Set a capture property; virtual sources accept no changes by default."""
+        return False
+
+
+class SyntheticSource(VirtualSource):
+    """Deterministic generated frames: a moving gradient or moving noise."""
+
+    backend_name = "SYNTHETIC"
+
+    def __init__(self, resolution: Optional[Tuple[int, int]] = None, fps: Optional[float] = None,
+                 pattern: str = "gradient", realtime: bool = True, seed: int = 0):
+        """
+        Initialize the source.
+
+        Args:
+            resolution: Fixed (width, height); if None the source accepts
+                        whatever resolution the camera settings request
+            fps: Fixed frame rate; if None the source accepts whatever FPS
+                 the camera settings request (starting at 30)
+            pattern: "gradient" (cheap to encode) or "noise" (worst case)
+            realtime: Pace frames to the frame rate
+            seed: Seed for the noise pattern
+        """
+        super().__init__(fps or 30.0, realtime)
+        if pattern not in ("gradient", "noise"):
+            raise ValueError(f"Unknown synthetic pattern: {pattern}")
+        self.pattern = pattern
+        self.seed = seed
+        self.fixed_resolution = resolution is not None
+        self.fixed_fps = fps is not None
+        self.resolution = resolution or (1280, 720)
+        self._texture: Optional[np.ndarray] = None
+        # OpenCV sets up its fonts on the first putText(), which takes tens
+        # of milliseconds; do that now rather than in the first frame
+        cv2.putText(np.zeros((1, 1, 3), dtype=np.uint8), "0", (0, 0),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0))
+
+    def _shape(self) -> Tuple[int, int, int]:
+        width, height = self.resolution
+        return (height, width, 3)
+
+    def _build_texture(self):
+        """
+        Pre-render an oversized texture; each frame is a shifted window of
+        it, so generating a frame costs one copy.
+        """
+        width, height = self.resolution
+        if self.pattern == "noise":
+            rng = np.random.default_rng(self.seed)
+            self._texture = rng.integers(0, 256, (height + 64, width, 3), dtype=np.uint8)
+            return
+
+        x = np.linspace(0, 2 * np.pi * 2, 2 * width, endpoint=False)
+        y = np.linspace(0, 255, height)[:, None]
+        texture = np.empty((height, 2 * width, 3), dtype=np.uint8)
+        texture[:, :, 0] = (127.5 + 127.5 * np.sin(x))[None, :]
+        texture[:, :, 1] = y
+        texture[:, :, 2] = (127.5 + 127.5 * np.cos(x / 2))[None, :]
+        self._texture = texture
+
+    def _render(self, image: np.ndarray):
+        if self._texture is None:
+            self._build_texture()
+        height, width, _ = image.shape
+        if self.pattern == "noise":
+            offset = (self.frame_index * 7) % 64
+            np.copyto(image, self._texture[offset:offset + height])
+        else:
+            offset = (self.frame_index * 4) % width
+            np.copyto(image, self._texture[:, offset:offset + width])
+        cv2.putText(image, f"{self.frame_index:06d}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+
+    def set(self, prop_id: int, value: float) -> bool:
+        """Accept resolution and FPS changes unless they were fixed by the spec."""
+        width, height = self.resolution
+        if prop_id == cv2.CAP_PROP_FPS:
+            if self.fixed_fps or value <= 0:
+                return False
+            self.fps = float(value)
+            return True
+        if self.fixed_resolution:
+            return False
+        if prop_id == cv2.CAP_PROP_FRAME_WIDTH and value > 0:
+            self.resolution = (int(value), height)
+        elif prop_id == cv2.CAP_PROP_FRAME_HEIGHT and value > 0:
+            self.resolution = (width, int(value))
+        else:
+            return False
+        self._texture = None
+        return True
+
+
+class FileSource(VirtualSource):
+    """Frames from a video file, optionally looping."""
+
+    backend_name = "FILE"
+
+    def __init__(self, path: str, loop: bool = True, realtime: bool = True):
+        """
+        Initialize the source.
+
+        Args:
+            path: Video file to read
+            loop: Start over at the end of the file
+            realtime: Pace frames to the file's frame rate
+        """
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(fps, realtime)
+        self.path = path
+        self.loop = loop
+        self._opened = self.cap.isOpened()
+
+    def _advance(self) -> bool:
+        if self.cap.grab():
+            return True
+        if not self.loop:
+            return False
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self.cap.grab()
+
+    def retrieve(self, image: Optional[np.ndarray] = None, flag: int = 0) -> Tuple[bool, Optional[np.ndarray]]:
+        """Decode the grabbed frame, into `image` if its shape matches."""
+        if not self._opened or self.frame_index < 0:
+            return False, None
+        return self.cap.retrieve(image)
+
+    def _render(self, image: np.ndarray):
+        # retrieve() above decodes straight from the file; this keeps the
+        # base class contract for callers that render into their own buffer
+        ok, decoded = self.cap.retrieve(image)
+        if ok and decoded is not image:
+            np.copyto(image, decoded)
+
+    def _shape(self) -> Tuple[int, int, int]:
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return (height, width, 3)
+
+    def get(self, prop_id: int) -> float:
+        """Get a capture property from the underlying file."""
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return self.cap.get(prop_id)
+        return super().get(prop_id)
+
+    def release(self):
+        """Close the file."""
+        super().release()
+        self.cap.release()
+
+
+class ImageSequenceSource(VirtualSource):
+    """Frames from a sequence of image files, optionally looping."""
+
+    backend_name = "IMAGES"
+
+    def __init__(self, pattern: str, fps: float = 30.0, loop: bool = True,
+                 realtime: bool = True):
+        """
+        Initialize the source.
+
+        Args:
+            pattern: Glob pattern or directory of images (sorted by name)
+            fps: Frame rate to deliver the images at
+            loop: Start over after the last image
+            realtime: Pace frames to the frame rate
+        """
+        super().__init__(fps, realtime)
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        extensions = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+        self.files: List[str] = sorted(
+            f for f in glob.glob(pattern) if f.lower().endswith(extensions)
+        )
+        self.loop = loop
+        self._opened = bool(self.files)
+        self._image: Optional[np.ndarray] = None
+
+    def _advance(self) -> bool:
+        position = self.frame_index + 1
+        if position >= len(self.files) and not self.loop:
+            return False
+        image = cv2.imread(self.files[position % len(self.files)])
+        if image is None:
+            return False
+        self._image = image
+        return True
+
+    def _shape(self) -> Tuple[int, int, int]:
+        if self._image is None:
+            self._image = cv2.imread(self.files[0])
+        return self._image.shape
+
+    def _render(self, image: np.ndarray):
+        np.copyto(image, self._image)
+
+    def get(self, prop_id: int) -> float:
+        """Get a capture property; the frame count is the number of images."""
+        if prop_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.files))
+        return super().get(prop_id)
+
+
+def _parse_resolution(text: str) -> Tuple[Optional[Tuple[int, int]], Optional[float]]:
+    """Parse 'WIDTHxHEIGHT[@FPS]' (either part may be missing)."""
+    resolution, fps = None, None
+    if "@" in text:
+        text, fps_text = text.split("@", 1)
+        fps = float(fps_text)
+    if text:
+        width, height = map(int, text.lower().split("x"))
+        resolution = (width, height)
+    return resolution, fps
+
+
+def _flag(options: Dict[str, List[str]], name: str, default: bool) -> bool:
+    """Read a boolean query option such as realtime=0."""
+    if name not in options:
+        return default
+    return options[name][-1].lower() not in ("0", "false", "no", "off")
+
+
+def open_source(spec: Union[int, str]):
+    """
+    Open a capture source from a camera ID or source spec.
+
+    Args:
+        spec: Camera index, virtual source spec (see module docstring), or
+              anything else cv2.VideoCapture accepts (file path, URL)
+
+    Returns:
+        An object with the cv2.VideoCapture interface
+    """
+    if isinstance(spec, int):
+        return cv2.VideoCapture(spec)
+    if spec.isdigit():
+        return cv2.VideoCapture(int(spec))
+
+    kind, _, rest = spec.partition(":")
+    target, _, query = rest.partition("?")
+    options = parse_qs(query)
+    realtime = _flag(options, "realtime", True)
+    loop = _flag(options, "loop", True)
+
+    if kind == "synthetic":
+        resolution, fps = _parse_resolution(target)
+        pattern = options.get("pattern", ["gradient"])[-1]
+        seed = int(options.get("seed", ["0"])[-1])
+        return SyntheticSource(resolution, fps, pattern, realtime, seed)
+    if kind == "file":
+        return FileSource(target, loop, realtime)
+    if kind == "images":
+        fps = float(options.get("fps", ["30"])[-1])
+        return ImageSequenceSource(target, fps, loop, realtime)
+
+    return cv2.VideoCapture(spec)
@@ -0,0 +1,152 @@
+"""
+Frame Pipeline Tracing
+
+Optional per-frame tracing of the capture pipeline (grab, retrieve,
+process, encode, write), exported as a Chrome trace_event JSON file that
+can be opened in chrome://tracing or https://ui.perfetto.dev.
+
+Tracing is off by default. Enable it with `enable(path)` (main.py --trace)
+or by setting the SIMPLE_CAMERA_TRACE environment variable to an output
+path; the trace is written when the process exits.
+
+Call sites check `TRACER.enabled` before taking timestamps, so a disabled
+tracer costs one attribute lookup per stage and never allocates:
+
+    if TRACER.enabled:
+        t0 = time.monotonic_ns()
+    ...
+    if TRACER.enabled:
+        TRACER.span(GRAB, frame_seq, t0)
+"""
+
+import atexit
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+# Pipeline stages
+GRAB = 0
+RETRIEVE = 1
+READ = 2
+PROCESS = 3
+ENCODE = 4
+WRITE = 5
+DISPLAY = 6
+
+STAGE_NAMES = ["grab", "retrieve", "read", "process", "encode", "write", "display"]
+
+
+class Tracer:
+    """Fixed-capacity recorder of per-frame stage timings."""
+
+    def __init__(self):
+        """Initialize a disabled tracer."""
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.capacity = 0
+        self._counter = itertools.count()
+        self._thread_names: Dict[int, str] = {}
+
+    def enable(self, path: str, capacity: int = 1 << 18):
+        """
+        Start recording and dump the trace to `path` at exit.
+
+        Args:
+            path: Output file for the Chrome trace JSON
+            capacity: Number of events kept; older events are overwritten
+        """
+        self.capacity = capacity
+        self._start = np.zeros(capacity, dtype=np.int64)
+        self._duration = np.zeros(capacity, dtype=np.int64)
+        self._frame = np.zeros(capacity, dtype=np.int64)
+        self._tid = np.zeros(capacity, dtype=np.int64)
+        self._stage = np.zeros(capacity, dtype=np.uint8)
+        self._counter = itertools.count()
+        if self.path is None:
+            atexit.register(self._dump_at_exit)
+        self.path = path
+        self.enabled = True
+
+    def span(self, stage: int, frame: int, start_ns: int):
+        """
+        Record that `stage` ran for `frame` from start_ns until now.
+
+        Args:
+            stage: One of the stage constants (GRAB, RETRIEVE, ...)
+            frame: Frame sequence number
+            start_ns: time.monotonic_ns() taken when the stage began
+        """
+        end_ns = time.monotonic_ns()
+        tid = threading.get_ident()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        # itertools.count is atomic under the GIL, so threads never share a slot
+        i = next(self._counter) % self.capacity
+        self._start[i] = start_ns
+        self._duration[i] = end_ns - start_ns
+        self._frame[i] = frame
+        self._tid[i] = tid
+        self._stage[i] = stage
+
+    def dump(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Write the recorded events as Chrome trace_event JSON.
+
+        Args:
+            path: Output file (defaults to the path given to enable())
+
+        Returns:
+            The path written, or None if tracing was never enabled
+        """
+        path = path or self.path
+        if path is None or self.capacity == 0:
+            return None
+
+        # Taking a number from the counter leaves that slot empty; empty
+        # slots have a zero start time and are skipped below
+        total = next(self._counter)
+        recorded = np.flatnonzero(self._start[:min(total, self.capacity)])
+        order = recorded[np.argsort(self._start[recorded])]
+
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self._thread_names.items()
+        ]
+        for i in order:
+            events.append({
+                "name": STAGE_NAMES[self._stage[i]],
+                "cat": "frame",
+                "ph": "X",
+                "ts": self._start[i] / 1000,
+                "dur": self._duration[i] / 1000,
+                "pid": pid,
+                "tid": int(self._tid[i]),
+                "args": {"frame": int(self._frame[i])},
+            })
+
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"Trace saved: {path} ({len(order)} events)")
+        return path
+
+    def _dump_at_exit(self):
+        if self.enabled:
+            self.dump()
+
+
+TRACER = Tracer()
+
+
+def enable(path: str, capacity: int = 1 << 18):
+    """Enable the global tracer (see Tracer.enable)."""
+    TRACER.enable(path, capacity)
+
+
+if os.environ.get("SIMPLE_CAMERA_TRACE"):
+    enable(os.environ["SIMPLE_CAMERA_TRACE"])